@@ -6,8 +6,20 @@ JRA-VAN オッズ取得の使用例
 
 from jravan_odds_fetcher import JRAVANOddsFetcher
 from odds_parser import parse_odds_record
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import time
+import asyncio
+
+
+def create_jvlink_executor() -> ThreadPoolExecutor:
+    """
+    JV-Link専用のワーカースレッドを作成
+
+    JV-LinkのCOMオブジェクトは作成したスレッドから呼び出す必要があり、
+    1つのセッションで同時に開けるデータも1つだけのため、ワーカーは1つにする
+    """
+    import pythoncom
+    return ThreadPoolExecutor(max_workers=1, initializer=pythoncom.CoInitialize)
 
 
 def example1_get_today_races():
@@ -133,86 +145,97 @@ def example3_parse_tansho_fukusho():
     fetcher.close()
 
 
-def example4_multiple_races():
-    """例4: 複数レースのオッズを順次取得"""
+async def example4_multiple_races():
+    """例4: 複数レースのオッズをまとめて取得"""
     print("\n" + "=" * 60)
-    print("例4: 複数レースのオッズを順次取得")
+    print("例4: 複数レースのオッズをまとめて取得")
     print("=" * 60 + "\n")
 
-    fetcher = JRAVANOddsFetcher()
+    loop = asyncio.get_running_loop()
 
-    if not fetcher.initialize():
-        print("初期化に失敗しました")
-        return
+    with create_jvlink_executor() as executor:
+        fetcher = JRAVANOddsFetcher()
 
-    today = datetime.now().strftime("%Y%m%d")
+        if not await loop.run_in_executor(executor, fetcher.initialize):
+            print("初期化に失敗しました")
+            return
 
-    # 東京競馬場の1～3レースのオッズを取得
-    race_numbers = [1, 2, 3]
+        today = datetime.now().strftime("%Y%m%d")
 
-    for race_num in race_numbers:
-        race_id = f"{today}0501{race_num:02d}01"  # 東京1回1日目 X レース
-        print(f"レース{race_num}R (ID: {race_id})")
+        # 東京競馬場の1～3レースのオッズを取得
+        race_numbers = [1, 2, 3]
 
-        odds_data = fetcher.get_realtime_odds(race_id)
+        # JV-Linkは1セッションずつしか扱えないため同時実行数は1
+        # サーバーへの負荷を考慮して各取得後に3秒空ける
+        semaphore = asyncio.Semaphore(1)
 
-        if odds_data:
-            print(f"  取得成功: {len(odds_data)}種類のオッズ")
-            for odds in odds_data:
-                print(f"    - {odds['type']}")
-        else:
-            print("  取得失敗またはデータなし")
+        async def fetch_odds(race_id: str):
+            async with semaphore:
+                odds_data = await loop.run_in_executor(executor, fetcher.get_realtime_odds, race_id)
+                await asyncio.sleep(3)
+                return odds_data
 
-        print()
+        race_ids = [f"{today}0501{race_num:02d}01" for race_num in race_numbers]  # 東京1回1日目 X レース
+        results = await asyncio.gather(*(fetch_odds(race_id) for race_id in race_ids))
 
-        # サーバーへの負荷を考慮して待機
-        if race_num < len(race_numbers):
-            print("  (3秒待機...)\n")
-            time.sleep(3)
+        for race_num, race_id, odds_data in zip(race_numbers, race_ids, results):
+            print(f"レース{race_num}R (ID: {race_id})")
 
-    fetcher.close()
+            if odds_data:
+                print(f"  取得成功: {len(odds_data)}種類のオッズ")
+                for odds in odds_data:
+                    print(f"    - {odds['type']}")
+            else:
+                print("  取得失敗またはデータなし")
+
+            print()
 
+        await loop.run_in_executor(executor, fetcher.close)
 
-def example5_odds_monitoring():
+
+async def example5_odds_monitoring():
     """例5: オッズの変動を定期的に監視（デモ）"""
     print("\n" + "=" * 60)
     print("例5: オッズ変動監視（3回取得のデモ）")
     print("=" * 60 + "\n")
 
-    fetcher = JRAVANOddsFetcher()
+    loop = asyncio.get_running_loop()
 
-    if not fetcher.initialize():
-        print("初期化に失敗しました")
-        return
+    with create_jvlink_executor() as executor:
+        fetcher = JRAVANOddsFetcher()
 
-    today = datetime.now().strftime("%Y%m%d")
-    race_id = f"{today}05010101"  # 東京1回1日目 1レース
+        if not await loop.run_in_executor(executor, fetcher.initialize):
+            print("初期化に失敗しました")
+            return
 
-    print(f"監視対象レース: {race_id}")
-    print("10秒間隔で3回取得します\n")
+        today = datetime.now().strftime("%Y%m%d")
+        race_id = f"{today}05010101"  # 東京1回1日目 1レース
 
-    for i in range(3):
-        print(f"[{i+1}回目] {datetime.now().strftime('%H:%M:%S')}")
+        print(f"監視対象レース: {race_id}")
+        print("10秒間隔で3回取得します\n")
 
-        odds_data = fetcher.get_realtime_odds(race_id)
+        for i in range(3):
+            print(f"[{i+1}回目] {datetime.now().strftime('%H:%M:%S')}")
 
-        if odds_data:
-            print(f"  オッズデータ取得成功: {len(odds_data)}種類")
+            odds_data = await loop.run_in_executor(executor, fetcher.get_realtime_odds, race_id)
 
-            # 単勝オッズのみ簡易表示
-            for odds in odds_data:
-                if odds['record_id'] == 'O1':
-                    print(f"  単勝・複勝オッズを確認")
-                    break
-        else:
-            print("  データなし")
+            if odds_data:
+                print(f"  オッズデータ取得成功: {len(odds_data)}種類")
 
-        if i < 2:
-            print("  (10秒待機...)\n")
-            time.sleep(10)
+                # 単勝オッズのみ簡易表示
+                for odds in odds_data:
+                    if odds['record_id'] == 'O1':
+                        print(f"  単勝・複勝オッズを確認")
+                        break
+            else:
+                print("  データなし")
 
-    print("\n監視終了")
-    fetcher.close()
+            if i < 2:
+                print("  (10秒待機...)\n")
+                await asyncio.sleep(10)
+
+        print("\n監視終了")
+        await loop.run_in_executor(executor, fetcher.close)
 
 
 def main():
@@ -227,7 +250,7 @@ def main():
     print("  1. 今日のレース情報を取得")
     print("  2. 特定レースのオッズを取得")
     print("  3. 単勝・複勝オッズを詳細にパース")
-    print("  4. 複数レースのオッズを順次取得")
+    print("  4. 複数レースのオッズをまとめて取得")
     print("  5. オッズ変動監視（デモ）")
     print("  0. すべての例を実行")
     print()
@@ -242,15 +265,15 @@ def main():
         elif choice == '3':
             example3_parse_tansho_fukusho()
         elif choice == '4':
-            example4_multiple_races()
+            asyncio.run(example4_multiple_races())
         elif choice == '5':
-            example5_odds_monitoring()
+            asyncio.run(example5_odds_monitoring())
         elif choice == '0':
             example1_get_today_races()
             example2_get_specific_race_odds()
             example3_parse_tansho_fukusho()
-            example4_multiple_races()
-            example5_odds_monitoring()
+            asyncio.run(example4_multiple_races())
+            asyncio.run(example5_odds_monitoring())
         else:
             print("無効な選択です")
 
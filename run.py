@@ -2,13 +2,57 @@
 JRA-VAN Odds API Server起動スクリプト
 """
 
+import importlib.util
+
+
+def _select_loop() -> str:
+    """uvloopがあれば使用（Windowsなど未対応環境ではasyncio）"""
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def _select_http() -> str:
+    """httptoolsがあれば使用（なければh11）"""
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def _select_workers(config, logger) -> int:
+    """
+    ワーカープロセス数を決定
+
+    JV-Linkは1台につき1セッションしか開けないため、JV-Link（pywin32）が使える環境では
+    複数プロセスから同時に取得すると衝突する。また受信オッズの保存ファイルは
+    プロセス間で排他しないため、保存が有効な場合も1プロセスに制限する。
+
+    Args:
+        config: 設定クラス
+        logger: ロガー
+
+    Returns:
+        int: ワーカープロセス数
+    """
+    workers = max(1, config.API_WORKERS)
+    if workers == 1:
+        return 1
+    if importlib.util.find_spec("win32com"):
+        logger.warning(
+            f"API_WORKERS={workers} は無視します: JV-Linkは複数プロセスから同時に使用できません"
+        )
+        return 1
+    if config.ENABLE_DATA_SAVE:
+        logger.warning(
+            f"API_WORKERS={workers} は無視します: ENABLE_DATA_SAVE=true の場合は1プロセスで実行します"
+        )
+        return 1
+    return workers
+
+
 if __name__ == "__main__":
-    from src.api_server import app
     from src.config import Config
     import uvicorn
     import logging
 
     logger = logging.getLogger(__name__)
+    workers = _select_workers(Config, logger)
 
     logger.info("=" * 60)
     logger.info("JRA-VAN Odds API Server")
@@ -16,12 +60,19 @@ if __name__ == "__main__":
     logger.info(f"環境: {Config.ENVIRONMENT}")
     logger.info(f"ホスト: {Config.API_HOST}")
     logger.info(f"ポート: {Config.API_PORT}")
+    logger.info(f"ワーカー数: {workers}")
     logger.info(f"モックモード: {Config.USE_MOCK_DATA}")
     logger.info("=" * 60)
 
+    # workers>1の場合はアプリをインポート文字列で渡す必要がある
     uvicorn.run(
-        app,
+        "src.api_server:app",
         host=Config.API_HOST,
         port=Config.API_PORT,
-        log_level=Config.LOG_LEVEL.lower()
+        log_level=Config.LOG_LEVEL.lower(),
+        workers=workers,
+        loop=_select_loop(),
+        http=_select_http(),
+        ws_ping_interval=Config.WS_PING_INTERVAL,
+        ws_ping_timeout=Config.WS_PING_TIMEOUT
     )
@@ -5,18 +5,31 @@ JRA-VAN 蓄積系データベースセットアップツール
 """
 
 import argparse
+import calendar
+import datetime as dt
 import logging
+import re
 import sys
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable, Optional, Tuple
 
 from src.historical_fetcher import HistoricalOddsFetcher
 from src.odds_cache import OddsCache
 from src.odds_parser import parse_odds_record
+from src.time_manager import TimeManager
 from src.config import Config
 
 logger = logging.getLogger(__name__)
 
+# レース情報レコードのフィールド位置（0始まり、文字単位）
+_RACE_ID_SLICE = slice(11, 27)      # レースID（16桁）
+_POST_TIME_SLICE = slice(42, 46)    # 発走時刻（HHMM形式、RAのみ）
+_RACE_NAME_SLICE = slice(112, 162)  # レース名（RAのみ）
+
+# コマンドライン引数の日付形式（YYYYMMDD）
+_DATE_RE = re.compile(r'[0-9]{8}')
+
 
 def setup_database(
     service_key: str,
@@ -40,15 +53,17 @@ def setup_database(
     Returns:
         bool: 成功すればTrue
     """
-    print("=" * 80)
-    print("JRA-VAN Historical Database Setup")
-    print("=" * 80)
-    print(f"Start date: {start_date}")
-    print(f"End date: {end_date or start_date}")
-    print(f"Data spec: {dataspec}")
-    print(f"Cache directory: {cache_dir}")
-    print("=" * 80)
-    print()
+    _write_lines([
+        "=" * 80,
+        "JRA-VAN Historical Database Setup",
+        "=" * 80,
+        f"Start date: {start_date}",
+        f"End date: {end_date or start_date}",
+        f"Data spec: {dataspec}",
+        f"Cache directory: {cache_dir}",
+        "=" * 80,
+        ""
+    ])
 
     # フェッチャーを初期化
     fetcher = HistoricalOddsFetcher(service_key)
@@ -57,38 +72,45 @@ def setup_database(
         logger.error("Failed to initialize JV-Link")
         return False
 
-    print("[OK] JV-Link initialized successfully")
-    print()
+    lines = ["[OK] JV-Link initialized successfully", ""]
 
     # キャッシュを初期化
     cache = OddsCache(cache_dir)
-    print(f"[OK] Cache initialized at {cache_dir}")
-    print()
+    lines += [f"[OK] Cache initialized at {cache_dir}", ""]
 
-    # キャッシュの存在確認
+    # 日付範囲を生成
     dates = generate_date_range(start_date, end_date)
-    cache_exists = False
+
+    # キャッシュ済みの日付を除外し、未取得の日付のみ処理する
+    pending_dates = []
     for date in dates:
         cached_races = cache.get_cached_races(date)
         if cached_races:
-            cache_exists = True
-            print(f"[INFO] Found existing cache for {date} ({len(cached_races)} races)")
-
-    if cache_exists:
-        print()
-        print("[INFO] Cache already exists. Skipping database setup.")
-        print("[INFO] If you want to re-download data, delete the cache directory first.")
-        print()
+            lines.append(f"[SKIP] Found existing cache for {date} ({len(cached_races)} races)")
+        else:
+            pending_dates.append(date)
+
+    if not pending_dates:
+        lines += [
+            "",
+            "[INFO] Cache already exists for all dates. Skipping database setup.",
+            "[INFO] If you want to re-download data, delete the cache directory first.",
+            ""
+        ]
+        _write_lines(lines)
         success = True
         record_count = 0
     else:
-        # データベースセットアップ
-        print("Starting database setup...")
-        print("Note: This may take several minutes for the first time.")
-        print()
+        # データベースセットアップ（未取得の最初の日付から）
+        lines += [
+            "Starting database setup...",
+            "Note: This may take several minutes for the first time.",
+            ""
+        ]
+        _write_lines(lines)
 
         success, record_count = fetcher.setup_database(
-            start_date=start_date,
+            start_date=pending_dates[0],
             end_date=end_date,
             dataspec=dataspec,
             show_dialog=show_dialog
@@ -99,61 +121,51 @@ def setup_database(
         fetcher.close()
         return False
 
-    print()
-    print(f"[OK] Database setup completed. Total records: {record_count}")
-    print()
-
     # データを取得してキャッシュに保存
-    print("Fetching and caching odds data...")
-    print()
+    _write_lines([
+        "",
+        f"[OK] Database setup completed. Total records: {record_count}",
+        "",
+        "Fetching and caching odds data...",
+        ""
+    ])
 
     try:
-        # 日付範囲を生成
-        dates = generate_date_range(start_date, end_date)
-
         total_races = 0
-        for date in dates:
-            print(f"Processing date: {date}")
-
-            # レース情報を取得
-            race_data = fetcher.get_race_data(date)
-            race_dict = {}
-
-            for data in race_data:
-                # RA (レース詳細) または H1 (馬毎レース情報) からレース情報を抽出
-                if data['record_id'] in ['RA', 'H1', 'H6']:
-                    race_info = parse_race_info_simple(data['raw_data'], data['record_id'])
-                    if race_info:
-                        race_id = race_info['race_id']
-                        if race_id not in race_dict:  # 重複を避ける
-                            race_dict[race_id] = race_info
-
-            print(f"  Found {len(race_dict)} races")
-
-            # 注意: 蓄積系データにはリアルタイムオッズは含まれないため、
-            # レース情報のみをキャッシュします
-            # オッズデータはリアルタイム取得時に速報系データ（JVRTOpen）から取得されます
-
-            # レース情報のみをキャッシュに保存
-            for race_id, race_info in race_dict.items():
-                # 空のオッズリストでキャッシュ（レース情報のみ）
-                cache.save_odds(race_id, [], race_info)
-                total_races += 1
-
-            print(f"  Cached {len(race_dict)} races (race info only)")
-            print()
-
-        print("=" * 80)
-        print(f"[SUCCESS] Setup completed!")
-        print(f"Total races cached: {total_races}")
-        print()
+
+        # JV-LinkのCOM呼び出しとレース抽出はこのスレッドで順番に行い、
+        # 前の日付のキャッシュ保存はワーカースレッドで並行して進める
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = None
+            for date in pending_dates:
+                # レース情報を1レコードずつ読みながら抽出（生レコードのリストは作らない）
+                try:
+                    race_dict, skipped_count = collect_races(fetcher.iter_race_data(date))
+                except Exception as e:
+                    logger.error(f"Data fetch error for {date}: {e}")
+                    race_dict, skipped_count = {}, 0
+
+                # 保留中の日付を待ってから次を投入（保持するデータは最大2日分）
+                if pending is not None:
+                    total_races += pending.result()
+                pending = executor.submit(_cache_race_data, cache, date, race_dict, skipped_count)
+
+            if pending is not None:
+                total_races += pending.result()
 
         # キャッシュ統計を表示
         stats = cache.get_cache_stats()
-        print("Cache statistics:")
-        for key, value in stats.items():
-            print(f"  {key}: {value}")
-        print()
+        _write_lines(
+            [
+                "=" * 80,
+                "[SUCCESS] Setup completed!",
+                f"Total races cached: {total_races}",
+                "",
+                "Cache statistics:"
+            ]
+            + [f"  {key}: {value}" for key, value in stats.items()]
+            + [""]
+        )
 
         return True
 
@@ -167,6 +179,93 @@ def setup_database(
         fetcher.close()
 
 
+def _cache_race_data(cache: OddsCache, date: str, race_dict: dict, skipped_count: int) -> int:
+    """
+    1日分のレース情報をキャッシュに保存
+
+    Args:
+        cache: オッズキャッシュ
+        date: 日付 (YYYYMMDD)
+        race_dict: レースIDごとのレース情報
+        skipped_count: 読み飛ばしたレコード数
+
+    Returns:
+        int: キャッシュに保存したレース数
+    """
+    lines = [f"Processing date: {date}"]
+
+    if skipped_count:
+        logger.warning(f"Skipped {skipped_count} short race records for {date}")
+
+    lines.append(f"  Found {len(race_dict)} races")
+
+    # 注意: 蓄積系データにはリアルタイムオッズは含まれないため、
+    # レース情報のみをキャッシュします
+    # オッズデータはリアルタイム取得時に速報系データ（JVRTOpen）から取得されます
+
+    # レース情報のみをキャッシュに保存（空のオッズリストでまとめて保存）
+    saved_count = cache.save_many(
+        (race_id, [], race_info) for race_id, race_info in race_dict.items()
+    )
+
+    lines.append(f"  Cached {len(race_dict)} races (race info only)")
+    lines.append("")
+
+    # 日付ごとにまとめて出力
+    _write_lines(lines)
+
+    return saved_count
+
+
+def _write_lines(lines: list):
+    """
+    複数行をまとめて1回の書き込みで標準出力に出力
+
+    Args:
+        lines: 出力する行のリスト
+    """
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+
+def _parse_race_fields(raw_data: str, record_id: str) -> Optional[Tuple[str, str, str]]:
+    """
+    レース情報レコードからフィールドを抽出
+
+    Args:
+        raw_data: 生データ
+        record_id: レコードID ('RA', 'H1', etc.)
+
+    Returns:
+        Optional[Tuple[str, str, str]]: (レースID, レース名, 発走時刻)
+    """
+    # 長さのみ事前に検証する（スライスは範囲外でも例外にならない）
+    n = len(raw_data)
+    if n < 30:
+        return None
+
+    # レースID: 位置11-26（H1/RA共通）
+    race_id = raw_data[_RACE_ID_SLICE].strip()
+
+    # H1レコード（馬毎レース情報）の場合
+    if record_id == 'H1' or record_id == 'H6':
+        # H1レコードフォーマット:
+        # H1[2] + データ区分[1] + 年月日[8] + レースID[16] + ...
+        # 位置: 0-1=H1, 2=データ区分, 3-10=年月日, 11-26=レースID
+        # H1レコードにはレース名・発走時刻がない
+        return race_id, '', ''
+
+    # RAレコード（レース詳細）の場合
+    # 発走時刻: 位置42-45 (HHMM形式)
+    post_time_raw = raw_data[_POST_TIME_SLICE] if n > 46 else "1000"
+    post_time = TimeManager.format_post_time(post_time_raw)
+
+    # レース名: 位置112-162
+    race_name = raw_data[_RACE_NAME_SLICE].strip() if n > 162 else ""
+
+    return race_id, race_name, post_time
+
+
 def parse_race_info_simple(raw_data: str, record_id: str = 'RA') -> dict:
     """
     レース情報レコードを簡易パース
@@ -178,49 +277,57 @@ def parse_race_info_simple(raw_data: str, record_id: str = 'RA') -> dict:
     Returns:
         dict: レース情報
     """
-    try:
-        if len(raw_data) < 30:
-            return None
-
-        # H1レコード（馬毎レース情報）の場合
-        if record_id == 'H1' or record_id == 'H6':
-            # H1レコードフォーマット:
-            # H1[2] + データ区分[1] + 年月日[8] + レースID[16] + ...
-            # 位置: 0-1=H1, 2=データ区分, 3-10=年月日, 11-26=レースID
-            if len(raw_data) < 27:
-                return None
-
-            race_id = raw_data[11:27].strip() if len(raw_data) > 27 else ""
-
-            return {
-                'race_id': race_id,
-                'race_name': '',  # H1レコードにはレース名がない
-                'post_time': '',   # H1レコードには発走時刻がない
-                'record_id': record_id
-            }
-
-        # RAレコード（レース詳細）の場合
-        else:
-            # レースID: 位置11-26
-            race_id = raw_data[11:27].strip() if len(raw_data) > 27 else ""
+    fields = _parse_race_fields(raw_data, record_id)
+    if fields is None:
+        return None
 
-            # 発走時刻: 位置42-45 (HHMM形式)
-            post_time_raw = raw_data[42:46] if len(raw_data) > 46 else "1000"
-            post_time = f"{post_time_raw[:2]}:{post_time_raw[2:]}"
+    race_id, race_name, post_time = fields
+    return {
+        'race_id': race_id,
+        'race_name': race_name,
+        'post_time': post_time,
+        'record_id': record_id if record_id == 'H1' or record_id == 'H6' else 'RA'
+    }
 
-            # レース名: 位置112-162
-            race_name = raw_data[112:162].strip() if len(raw_data) > 162 else ""
 
-            return {
-                'race_id': race_id,
-                'race_name': race_name,
-                'post_time': post_time,
-                'record_id': 'RA'
-            }
+def collect_races(race_data: Iterable[Tuple[str, str]]) -> Tuple[dict, int]:
+    """
+    レコード一覧からレースごとのレース情報をまとめて抽出
 
-    except Exception as e:
-        logger.warning(f"Failed to parse race info ({record_id}): {e}")
-        return None
+    同一レースの2件目以降（H1は出走馬の数だけ存在する）はレースIDだけ確認してパースせずに読み飛ばす
+
+    Args:
+        race_data: JV-Linkから取得した (レコードID, 生データ) のタプル（リストまたはイテレータ）
+
+    Returns:
+        Tuple[dict, int]: (レースIDごとのレース情報, 短すぎて読み飛ばしたレコード数)
+    """
+    race_dict = {}
+    skipped_count = 0
+
+    for record_id, raw_data in race_data:
+        # RA (レース詳細) または H1 (馬毎レース情報) からレース情報を抽出
+        if record_id != 'RA' and record_id != 'H1' and record_id != 'H6':
+            continue
+
+        if len(raw_data) < 30:
+            skipped_count += 1
+            continue
+
+        # 既出のレースはパース前に読み飛ばす
+        race_id = raw_data[_RACE_ID_SLICE].strip()
+        if race_id in race_dict:
+            continue
+
+        _, race_name, post_time = _parse_race_fields(raw_data, record_id)
+        race_dict[race_id] = {
+            'race_id': race_id,
+            'race_name': race_name,
+            'post_time': post_time,
+            'record_id': record_id
+        }
+
+    return race_dict, skipped_count
 
 
 def generate_date_range(start_date: str, end_date: str = None) -> list:
@@ -238,22 +345,37 @@ def generate_date_range(start_date: str, end_date: str = None) -> list:
         return [start_date]
 
     try:
-        start = datetime.strptime(start_date, "%Y%m%d")
-        end = datetime.strptime(end_date, "%Y%m%d")
-
-        dates = []
-        current = start
-        while current <= end:
-            dates.append(current.strftime("%Y%m%d"))
-            current += timedelta(days=1)
+        start = dt.datetime.strptime(start_date, "%Y%m%d").toordinal()
+        end = dt.datetime.strptime(end_date, "%Y%m%d").toordinal()
 
-        return dates
+        # 序数日の範囲から直接生成（timedeltaの加算・strftimeを繰り返さない）
+        fromordinal = dt.date.fromordinal
+        return [fromordinal(o).isoformat().replace('-', '') for o in range(start, end + 1)]
 
     except Exception as e:
         logger.error(f"Date range generation error: {e}")
         return [start_date]
 
 
+def _is_valid_date(value: str) -> bool:
+    """
+    YYYYMMDD形式の実在する日付か確認（strptimeを使わない軽量版）
+
+    Args:
+        value: 日付文字列
+
+    Returns:
+        bool: 正しい日付ならTrue
+    """
+    if not _DATE_RE.fullmatch(value):
+        return False
+
+    year, month, day = int(value[:4]), int(value[4:6]), int(value[6:])
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return False
+    return day <= calendar.monthrange(year, month)[1]
+
+
 def main():
     """メイン処理"""
     parser = argparse.ArgumentParser(
@@ -311,11 +433,7 @@ def main():
     )
 
     # 日付フォーマットチェック
-    try:
-        datetime.strptime(args.start_date, "%Y%m%d")
-        if args.end_date:
-            datetime.strptime(args.end_date, "%Y%m%d")
-    except ValueError:
+    if not _is_valid_date(args.start_date) or (args.end_date and not _is_valid_date(args.end_date)):
         print("Error: Invalid date format. Use YYYYMMDD format.")
         return 1
 
@@ -330,20 +448,24 @@ def main():
     )
 
     if success:
-        print()
-        print("=" * 80)
-        print("Setup completed successfully!")
-        print()
-        print("You can now run the API server in development mode:")
-        print("  export ENVIRONMENT=development")
-        print("  python api_server.py")
-        print()
+        _write_lines([
+            "",
+            "=" * 80,
+            "Setup completed successfully!",
+            "",
+            "You can now run the API server in development mode:",
+            "  export ENVIRONMENT=development",
+            "  python api_server.py",
+            ""
+        ])
         return 0
     else:
-        print()
-        print("=" * 80)
-        print("Setup failed. Please check the logs for details.")
-        print()
+        _write_lines([
+            "",
+            "=" * 80,
+            "Setup failed. Please check the logs for details.",
+            ""
+        ])
         return 1
 
 
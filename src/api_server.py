@@ -7,18 +7,29 @@ WebSocketによるリアルタイムオッズ配信をサポート
 
 import asyncio
 import logging
-from typing import Dict, List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
 from enum import Enum
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
 
+from . import jsonutil
 from .config import Config
 from .data_service import get_data_service
 
+# JV-Link(COM)を扱うワーカースレッドの初期化用（Windowsのみ）
+try:
+    import pythoncom
+    PYTHONCOM_AVAILABLE = True
+except ImportError:
+    PYTHONCOM_AVAILABLE = False
+
 
 class DataSourceEnum(str, Enum):
     """データソース選択"""
@@ -94,36 +105,86 @@ class ErrorResponse(BaseModel):
     timestamp: str
 
 
+# オッズ配信用タイムスタンプのキャッシュ（この間隔内は同じ文字列を使い回す）
+_TIMESTAMP_RESOLUTION = 0.1  # 秒
+_timestamp_cache = [0.0, ""]
+
+
+def _now_iso() -> str:
+    """
+    現在時刻のISO 8601文字列を取得（0.1秒単位でキャッシュ）
+
+    Returns:
+        str: 現在時刻
+    """
+    now = time.monotonic()
+    if now - _timestamp_cache[0] >= _TIMESTAMP_RESOLUTION:
+        _timestamp_cache[0] = now
+        _timestamp_cache[1] = datetime.now().isoformat()
+    return _timestamp_cache[1]
+
+
 # WebSocket接続管理
 class ConnectionManager:
-    """WebSocket接続マネージャー"""
+    """
+    WebSocket接続マネージャー
+
+    レース・データソースごとに1つの配信タスクを持ち、
+    オッズの取得は接続数に関係なく1回にまとめてブロードキャストする
+    """
 
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.active_connections: Dict[str, Set[WebSocket]] = {}
+        self._subscribers: Dict[Tuple[str, str], Set[WebSocket]] = {}
+        self._producers: Dict[Tuple[str, str], asyncio.Task] = {}
 
-    async def connect(self, race_id: str, websocket: WebSocket):
-        """接続を追加"""
+    async def connect(self, race_id: str, websocket: WebSocket, data_source: str = "auto"):
+        """接続を追加し、必要なら配信タスクを開始"""
         await websocket.accept()
-        if race_id not in self.active_connections:
-            self.active_connections[race_id] = []
-        self.active_connections[race_id].append(websocket)
-        logger.info(f"WebSocket接続: race_id={race_id}, 接続数={len(self.active_connections[race_id])}")
+        connections = self.active_connections.setdefault(race_id, set())
+        connections.add(websocket)
+
+        key = (race_id, data_source)
+        self._subscribers.setdefault(key, set()).add(websocket)
+        if key not in self._producers:
+            self._producers[key] = asyncio.create_task(self._produce(race_id, data_source))
+
+        logger.info(f"WebSocket接続: race_id={race_id}, 接続数={len(connections)}")
 
     def disconnect(self, race_id: str, websocket: WebSocket):
-        """接続を削除"""
-        if race_id in self.active_connections:
-            self.active_connections[race_id].remove(websocket)
-            logger.info(f"WebSocket切断: race_id={race_id}, 接続数={len(self.active_connections[race_id])}")
-            if not self.active_connections[race_id]:
+        """接続を削除し、購読者がいなくなった配信タスクを停止"""
+        connections = self.active_connections.get(race_id)
+        if connections is not None:
+            connections.discard(websocket)
+            logger.info(f"WebSocket切断: race_id={race_id}, 接続数={len(connections)}")
+            if not connections:
                 del self.active_connections[race_id]
 
-    async def broadcast(self, race_id: str, message: dict):
-        """指定レースの全接続にブロードキャスト"""
-        if race_id in self.active_connections:
+        for key in [k for k in self._subscribers if k[0] == race_id]:
+            subscribers = self._subscribers[key]
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self._subscribers[key]
+                producer = self._producers.pop(key, None)
+                if producer:
+                    producer.cancel()
+
+    async def broadcast(self, race_id: str, message: dict, data_source: Optional[str] = None):
+        """
+        指定レースの全接続（data_source指定時はその購読者のみ）にブロードキャスト
+        """
+        if data_source is None:
+            connections = self.active_connections.get(race_id)
+        else:
+            connections = self._subscribers.get((race_id, data_source))
+
+        if connections:
+            # 全接続で同じ内容のため、シリアライズは1回だけ行う
+            payload = jsonutil.dumps(message).decode('utf-8')
             disconnected = []
-            for connection in self.active_connections[race_id]:
+            for connection in list(connections):
                 try:
-                    await connection.send_json(message)
+                    await connection.send_text(payload)
                 except Exception as e:
                     logger.error(f"送信エラー: {e}")
                     disconnected.append(connection)
@@ -132,6 +193,41 @@ class ConnectionManager:
             for conn in disconnected:
                 self.disconnect(race_id, conn)
 
+    async def _produce(self, race_id: str, data_source: str):
+        """
+        更新間隔ごとにオッズを1回取得して購読者に配信
+
+        Args:
+            race_id: レースID
+            data_source: データソース
+        """
+        while True:
+            # 初回データは接続時に各ハンドラーが送信済み
+            await asyncio.sleep(Config.REALTIME_UPDATE_INTERVAL)
+
+            try:
+                result = await _get_realtime_odds_cached(race_id, data_source=data_source)
+                if result.get('odds'):
+                    await self.broadcast(race_id, {
+                        'type': 'update',
+                        'race_id': race_id,
+                        'odds': result.get('odds', []),
+                        'is_past_data': result.get('is_past_data', False),
+                        'deadline_info': result.get('deadline_info', {}),
+                        'warning': result.get('past_data_note'),
+                        'timestamp': _now_iso()
+                    }, data_source=data_source)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"オッズ配信エラー: race_id={race_id}, {e}")
+
+    def shutdown(self):
+        """全ての配信タスクを停止"""
+        for producer in self._producers.values():
+            producer.cancel()
+        self._producers.clear()
+
 
 manager = ConnectionManager()
 
@@ -140,6 +236,130 @@ manager = ConnectionManager()
 data_service = None
 
 
+def _init_data_worker():
+    """データサービス用ワーカースレッドの初期化"""
+    if PYTHONCOM_AVAILABLE:
+        pythoncom.CoInitialize()
+
+
+# データサービス呼び出し用のワーカースレッド（起動時に作成し、終了時に停止する）
+# JV-LinkのCOMオブジェクトは作成したスレッドから呼び出す必要があるため、ワーカーは1つにする
+_data_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_data_executor() -> ThreadPoolExecutor:
+    """
+    データサービス用のワーカースレッドを取得（停止後は作り直す）
+
+    Returns:
+        ThreadPoolExecutor: ワーカースレッド
+    """
+    global _data_executor
+    if _data_executor is None:
+        _data_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="data-service",
+            initializer=_init_data_worker
+        )
+    return _data_executor
+
+
+async def _run_blocking(func, *args, **kwargs):
+    """
+    ブロッキングするデータサービス呼び出しをワーカースレッドで実行
+
+    Args:
+        func: 呼び出す関数
+        *args: 位置引数
+        **kwargs: キーワード引数
+
+    Returns:
+        funcの戻り値
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_data_executor(), partial(func, *args, **kwargs))
+
+
+# リアルタイムオッズの短期キャッシュ
+# 同じレースへの同時アクセス（REST・複数のWebSocket接続）で上流からの取得を共有する
+_ODDS_CACHE_TTL = Config.REALTIME_UPDATE_INTERVAL  # 秒
+_ODDS_CACHE_MAXSIZE = 1024
+_odds_cache: Dict[tuple, tuple] = {}
+# 進行中の取得 {キー: タスク}（同じキーの同時リクエストは1回の取得に相乗りする）
+_odds_inflight: Dict[tuple, asyncio.Task] = {}
+
+
+async def _get_realtime_odds_cached(
+    race_id: str,
+    seconds_before_deadline: Optional[int] = None,
+    data_source: str = "auto",
+    refresh: bool = False
+) -> Dict:
+    """
+    リアルタイムオッズをTTL付きキャッシュ経由で取得（同時リクエストは1回の取得にまとめる）
+
+    Args:
+        race_id: レースID
+        seconds_before_deadline: 締め切りの何秒前のデータを取得するか
+        data_source: データソース
+        refresh: Trueの場合はキャッシュを使わず取得し直す
+
+    Returns:
+        Dict: get_realtime_odds の結果
+    """
+    key = (race_id, seconds_before_deadline, data_source)
+    now = time.monotonic()
+
+    if not refresh:
+        entry = _odds_cache.get(key)
+        if entry is not None and now - entry[0] < _ODDS_CACHE_TTL:
+            return entry[1]
+
+    # 進行中の取得があれば、その結果を待つ（refresh時も取得中の結果は新しいため共有する）
+    task = _odds_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_realtime_odds(key))
+        _odds_inflight[key] = task
+        task.add_done_callback(lambda _: _odds_inflight.pop(key, None))
+
+    # 呼び出し元がキャンセルされても、相乗りしている他の呼び出しには影響させない
+    return await asyncio.shield(task)
+
+
+async def _fetch_realtime_odds(key: tuple) -> Dict:
+    """
+    リアルタイムオッズを取得してキャッシュに格納
+
+    Args:
+        key: (レースID, 締め切りの何秒前か, データソース)
+
+    Returns:
+        Dict: get_realtime_odds の結果
+    """
+    race_id, seconds_before_deadline, data_source = key
+    now = time.monotonic()
+
+    result = await _run_blocking(
+        data_service.get_realtime_odds,
+        race_id,
+        seconds_before_deadline,
+        data_source=data_source
+    )
+
+    # エラー結果はキャッシュしない
+    if 'error' not in result:
+        _odds_cache.pop(key, None)
+        if len(_odds_cache) >= _ODDS_CACHE_MAXSIZE:
+            # 期限切れを削除し、それでも満杯なら最も古いエントリを削除
+            for expired in [k for k, (ts, _) in _odds_cache.items() if now - ts >= _ODDS_CACHE_TTL]:
+                del _odds_cache[expired]
+            if len(_odds_cache) >= _ODDS_CACHE_MAXSIZE:
+                del _odds_cache[next(iter(_odds_cache))]
+        _odds_cache[key] = (now, result)
+
+    return result
+
+
 @app.on_event("startup")
 async def startup_event():
     """起動時の処理"""
@@ -148,6 +368,8 @@ async def startup_event():
     logger.info(f"環境: {Config.ENVIRONMENT}")
     logger.info(f"モックモード: {Config.USE_MOCK_DATA}")
 
+    _get_data_executor()
+
     try:
         data_service = get_data_service()
         logger.info("データサービスの初期化完了")
@@ -159,9 +381,18 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """終了時の処理"""
+    global _data_executor
     logger.info("APIサーバーをシャットダウンします...")
+    manager.shutdown()
+    for task in list(_odds_inflight.values()):
+        task.cancel()
+    _odds_inflight.clear()
+    _odds_cache.clear()
     if data_service:
-        data_service.close()
+        await _run_blocking(data_service.close)
+    if _data_executor is not None:
+        _data_executor.shutdown(wait=True)
+        _data_executor = None
 
 
 # REST API エンドポイント
@@ -204,7 +435,7 @@ async def get_status():
     )
 
 
-@app.get("/api/races/{date}", response_model=RaceInfoResponse)
+@app.get("/api/races/{date}", responses={200: {"model": RaceInfoResponse}})
 async def get_races(
     date: str,
     data_source: DataSourceEnum = Query(
@@ -220,11 +451,12 @@ async def get_races(
         data_source: データソース
     """
     try:
-        races = data_service.get_race_info(date, data_source=data_source.value)
-        return RaceInfoResponse(
-            date=date,
-            races=races,
-            count=len(races)
+        races = await _run_blocking(data_service.get_race_info, date, data_source=data_source.value)
+
+        # レース一覧はモデル検証を経由せず直接エンコードする（スキーマはドキュメント用に保持）
+        return Response(
+            content=jsonutil.dumps({'date': date, 'races': races, 'count': len(races)}),
+            media_type="application/json"
         )
     except Exception as e:
         logger.error(f"レース情報取得エラー: {e}")
@@ -255,10 +487,12 @@ async def get_odds(
         data_source: データソース
     """
     try:
-        result = data_service.get_realtime_odds(
+        # 保存する場合はキャッシュを使わず最新を取得
+        result = await _get_realtime_odds_cached(
             race_id,
             seconds_before_deadline,
-            data_source=data_source.value
+            data_source.value,
+            refresh=save and data_service.data_save_enabled
         )
 
         if 'error' in result:
@@ -276,15 +510,15 @@ async def get_odds(
             )
 
         # オッズデータを保存
-        if save and Config.ENABLE_DATA_SAVE:
-            data_service.save_odds_data(race_id, odds_data)
+        if save and data_service.data_save_enabled:
+            await _run_blocking(data_service.save_odds_data, race_id, odds_data)
 
         # レスポンス構築
         response = {
             'race_id': race_id,
             'odds': odds_data,
             'count': len(odds_data),
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now_iso(),
             'is_past_data': result.get('is_past_data', False),
             'deadline_info': result.get('deadline_info', {}),
         }
@@ -297,7 +531,8 @@ async def get_odds(
         if seconds_before_deadline is not None:
             response['seconds_before_deadline'] = seconds_before_deadline
 
-        return response
+        # オッズ一覧は大きくなりやすいため、jsonable_encoderを経由せず直接エンコードする
+        return Response(content=jsonutil.dumps(response), media_type="application/json")
 
     except HTTPException:
         raise
@@ -322,7 +557,7 @@ async def get_race_detail(
         data_source: データソース
     """
     try:
-        detail = data_service.get_race_detail(race_id, data_source=data_source.value)
+        detail = await _run_blocking(data_service.get_race_detail, race_id, data_source=data_source.value)
 
         if not detail:
             raise HTTPException(
@@ -348,7 +583,7 @@ async def get_saved_odds(race_id: str):
         race_id: レースID
     """
     try:
-        odds = data_service.load_saved_odds(race_id)
+        odds = await _run_blocking(data_service.load_saved_odds, race_id)
 
         if not odds:
             raise HTTPException(
@@ -385,11 +620,11 @@ async def websocket_odds(
         race_id: レースID
         data_source: データソース
     """
-    await manager.connect(race_id, websocket)
+    await manager.connect(race_id, websocket, data_source)
 
     try:
         # 初回データ送信
-        initial_result = data_service.get_realtime_odds(race_id, data_source=data_source)
+        initial_result = await _get_realtime_odds_cached(race_id, data_source=data_source)
         await websocket.send_json({
             'type': 'initial',
             'race_id': race_id,
@@ -397,40 +632,14 @@ async def websocket_odds(
             'is_past_data': initial_result.get('is_past_data', False),
             'deadline_info': initial_result.get('deadline_info', {}),
             'warning': initial_result.get('past_data_note'),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': _now_iso()
         })
 
-        # リアルタイム更新ループ
+        # 以降の更新は配信タスクがブロードキャストするため、ここではping/pongのみ処理
         while True:
-            try:
-                # クライアントからのメッセージを受信（ping/pong用）
-                data = await asyncio.wait_for(
-                    websocket.receive_text(),
-                    timeout=Config.WS_PING_TIMEOUT
-                )
-
-                if data == "ping":
-                    await websocket.send_text("pong")
-
-            except asyncio.TimeoutError:
-                # タイムアウト時は定期的にオッズを更新
-                pass
-
-            # オッズデータを取得して送信
-            result = data_service.get_realtime_odds(race_id, data_source=data_source)
-            if result.get('odds'):
-                await websocket.send_json({
-                    'type': 'update',
-                    'race_id': race_id,
-                    'odds': result.get('odds', []),
-                    'is_past_data': result.get('is_past_data', False),
-                    'deadline_info': result.get('deadline_info', {}),
-                    'warning': result.get('past_data_note'),
-                    'timestamp': datetime.now().isoformat()
-                })
-
-            # 更新間隔待機
-            await asyncio.sleep(Config.REALTIME_UPDATE_INTERVAL)
+            data = await websocket.receive_text()
+            if data == "ping":
+                await websocket.send_text("pong")
 
     except WebSocketDisconnect:
         logger.info(f"WebSocket切断: race_id={race_id}")
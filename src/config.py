@@ -5,6 +5,7 @@
 """
 
 import os
+import re
 from enum import Enum
 from pathlib import Path
 from dotenv import load_dotenv
@@ -14,6 +15,26 @@ env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
 
+def _int_env(name: str, default: int) -> int:
+    """
+    整数の環境変数を読み込む
+
+    Args:
+        name: 環境変数名
+        default: 未設定または不正な値の場合の既定値
+
+    Returns:
+        int: 設定値
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
 class Environment(str, Enum):
     """実行環境"""
     DEVELOPMENT = "development"
@@ -41,32 +62,35 @@ class Config:
 
     # API設定
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
-    API_PORT = int(os.getenv("API_PORT", "8000"))
+    API_PORT = _int_env("API_PORT", 8000)
+    API_WORKERS = _int_env("API_WORKERS", 1)  # JV-Link使用時・データ保存時はrun.pyで1に制限
     API_TITLE = "JRA-VAN Odds API"
     API_VERSION = "1.0.0"
     API_DESCRIPTION = "JRA-VAN競馬リアルタイムオッズ取得API"
 
     # CORS設定
-    CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
+    CORS_ORIGINS = tuple(
+        origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()
+    )
 
     # データキャッシュ設定
     ENABLE_CACHE = os.getenv("ENABLE_CACHE", "true").lower() == "true"
     CACHE_DIR = os.getenv("CACHE_DIR", "./cache")
-    CACHE_TTL = int(os.getenv("CACHE_TTL", "60"))  # 秒
+    CACHE_TTL = _int_env("CACHE_TTL", 60)  # 秒
 
     # データ保存設定
     ENABLE_DATA_SAVE = os.getenv("ENABLE_DATA_SAVE", "true").lower() == "true"
     DATA_DIR = os.getenv("DATA_DIR", "./data")
 
     # WebSocket設定
-    WS_PING_INTERVAL = int(os.getenv("WS_PING_INTERVAL", "30"))  # 秒
-    WS_PING_TIMEOUT = int(os.getenv("WS_PING_TIMEOUT", "10"))  # 秒
+    WS_PING_INTERVAL = _int_env("WS_PING_INTERVAL", 30)  # 秒
+    WS_PING_TIMEOUT = _int_env("WS_PING_TIMEOUT", 10)  # 秒
 
     # リアルタイム更新設定
-    REALTIME_UPDATE_INTERVAL = int(os.getenv("REALTIME_UPDATE_INTERVAL", "10"))  # 秒
+    REALTIME_UPDATE_INTERVAL = _int_env("REALTIME_UPDATE_INTERVAL", 10)  # 秒
 
     # ログ設定
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
     LOG_FILE = os.getenv("LOG_FILE", "jravan_api.log")
 
     # 開発モード設定
@@ -77,7 +101,7 @@ class Config:
     ENABLE_HISTORICAL_DATA = os.getenv("ENABLE_HISTORICAL_DATA", "true").lower() == "true"
     HISTORICAL_CACHE_DIR = os.getenv("HISTORICAL_CACHE_DIR", "./historical_cache")
     HISTORICAL_AUTO_FETCH = os.getenv("HISTORICAL_AUTO_FETCH", "false").lower() == "true"
-    HISTORICAL_DATA_RETENTION_DAYS = int(os.getenv("HISTORICAL_DATA_RETENTION_DAYS", "365"))
+    HISTORICAL_DATA_RETENTION_DAYS = _int_env("HISTORICAL_DATA_RETENTION_DAYS", 365)
 
     @classmethod
     def is_development(cls) -> bool:
@@ -106,23 +130,37 @@ class Config:
         }
 
 
+# .envの行パターン（空行・コメント行はマッチしない）
+_ENV_RE = re.compile(r'(?m)^\s*([A-Za-z_][A-Za-z0-9_]*)\s*=[ \t]*(.*?)\s*$')
+
+# パース済み.envのキャッシュ {filepath: (mtime_ns, pairs)}
+_ENV_CACHE: dict = {}
+
+
 # 環境変数からの設定読み込み
 def load_env_file(filepath: str = ".env"):
     """
     .envファイルから環境変数を読み込む
 
+    前回読み込み時から更新されていなければパース結果を再利用する
+
     Args:
         filepath: .envファイルのパス
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
+        mtime_ns = os.stat(filepath).st_mtime_ns
     except FileNotFoundError:
-        pass  # .envファイルがなければスキップ
+        return  # .envファイルがなければスキップ
+
+    cached = _ENV_CACHE.get(filepath)
+    if cached is not None and cached[0] == mtime_ns:
+        os.environ.update(cached[1])
+        return
+
+    text = Path(filepath).read_text(encoding='utf-8')
+    pairs = dict(_ENV_RE.findall(text))
+    _ENV_CACHE[filepath] = (mtime_ns, pairs)
+    os.environ.update(pairs)
 
 
 # .envファイルの読み込みを試行
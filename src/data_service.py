@@ -6,80 +6,277 @@
 
 import json
 import logging
+import mmap
+import os
+import struct
+import threading
 from typing import Dict, List, Optional
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
+from . import jsonutil
 from .config import Config
-from .mock_provider import get_mock_provider
 from .time_manager import TimeManager, HistoricalOddsSimulator
-from .historical_data_provider import HistoricalDataProvider
 
-# 本番環境ではjravan_odds_fetcherをインポート
-try:
-    from .jravan_odds_fetcher import JRAVANOddsFetcher
-    JRAVAN_AVAILABLE = True
-except ImportError:
-    JRAVAN_AVAILABLE = False
-    logging.warning("jravan_odds_fetcherがインポートできません。モックモードのみ使用可能です。")
+logger = logging.getLogger(__name__)
 
+# 保存オッズログ（レースごとの追記専用ファイル）
+# 1レコード = [ペイロード長(4byte LE)] + [JSON] + [ペイロード長(4byte LE)]
+ODDS_LOG_SUFFIX = ".odds.log"
+_FRAME_LEN = struct.Struct('<I')
+_MAX_OPEN_LOGS = 128
+
+# 発走時刻キャッシュの最大件数（超えた場合は古いものから削除）
+_POST_TIME_CACHE_MAXSIZE = 1024
+
+@lru_cache(maxsize=None)
+def _jravan_fetcher_class():
+    """
+    JRAVANOddsFetcherクラスを取得（初回呼び出し時にインポート）
+
+    pywin32に依存するため、リアルタイムデータが必要になるまで読み込まない
+
+    Returns:
+        JRAVANOddsFetcherクラス、インポートできない場合はNone
+    """
+    try:
+        from .jravan_odds_fetcher import JRAVANOddsFetcher
+    except ImportError:
+        logger.warning("jravan_odds_fetcherがインポートできません。モックモードのみ使用可能です。")
+        return None
+    return JRAVANOddsFetcher
+
+
+def jravan_available() -> bool:
+    """JRA-VAN（リアルタイムデータ）が利用可能か"""
+    return _jravan_fetcher_class() is not None
+
+
+@lru_cache(maxsize=1024)
+def _date_dir(data_dir: str, date: str) -> Path:
+    """
+    保存データの日付ディレクトリのパスを取得（日付ごとにキャッシュ）
+
+    Args:
+        data_dir: データ保存ディレクトリ
+        date: 日付 (YYYYMMDD)
+
+    Returns:
+        Path: 日付ディレクトリのパス
+    """
+    return Path(data_dir) / date
+
+
+@lru_cache(maxsize=1024)
+def _ensure_date_dir(data_dir: str, date: str) -> Path:
+    """
+    保存データの日付ディレクトリを作成（作成済みならmkdirを省略）
+
+    Args:
+        data_dir: データ保存ディレクトリ
+        date: 日付 (YYYYMMDD)
+
+    Returns:
+        Path: 日付ディレクトリのパス
+    """
+    date_dir = _date_dir(data_dir, date)
+    date_dir.mkdir(parents=True, exist_ok=True)
+    return date_dir
+
+
+def _read_last_frame(filepath: Path) -> Optional[bytes]:
+    """
+    保存オッズログから最後の完全なレコードを読み込み
+
+    末尾の長さから逆引きし、書き込み途中で壊れている場合は先頭から走査する
+
+    Args:
+        filepath: ログファイルのパス
+
+    Returns:
+        Optional[bytes]: 最後のレコードのペイロード、なければNone
+    """
+    frame_size = _FRAME_LEN.size
+    unpack_from = _FRAME_LEN.unpack_from
+
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < frame_size * 2:
+            return None
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # 末尾のフッターから最新レコードを特定
+            (length,) = unpack_from(mm, size - frame_size)
+            start = size - frame_size - length
+            if start >= frame_size and unpack_from(mm, start - frame_size)[0] == length:
+                return mm[start:size - frame_size]
+
+            # 末尾が壊れている場合は先頭から完全なレコードを辿る
+            last = None
+            pos = 0
+            while pos + frame_size <= size:
+                (length,) = unpack_from(mm, pos)
+                end = pos + frame_size + length + frame_size
+                if end > size or unpack_from(mm, end - frame_size)[0] != length:
+                    break
+                last = (pos + frame_size, end - frame_size)
+                pos = end
+
+            return mm[last[0]:last[1]] if last else None
 
-logger = logging.getLogger(__name__)
+
+# データソースごとのプロバイダー（DataServiceの属性名, 表示名）
+_PROVIDERS = {
+    'historical': ('historical_provider', '蓄積系データプロバイダー'),
+    'realtime': ('fetcher', 'リアルタイムデータプロバイダー'),
+    'mock': ('mock_provider', 'モックプロバイダー'),
+}
 
 
 class DataService:
     """データサービスクラス"""
 
     def __init__(self):
-        """初期化 - 両方のプロバイダーを初期化（利用可能な場合）"""
-        self.fetcher = None
-        self.mock_provider = None
+        """
+        初期化
+
+        蓄積系データプロバイダーのみ即時に初期化し、
+        リアルタイム（JV-Link）とモックは初回アクセス時に初期化する
+        """
+        self._fetcher = None
+        self._fetcher_loaded = False
+        self._mock_provider = None
+        self._mock_loaded = False
+        self._lock = threading.Lock()
         self.historical_provider = None
 
+        # 過去オッズシミュレーター（状態を持たないため共有する）
+        self._simulator = HistoricalOddsSimulator()
+
+        # 解決済みデータソース {指定値: 解決結果}
+        self._resolved_sources: Dict[str, str] = {}
+
+        # レースIDごとの発走時刻キャッシュ（レース中に変化しないため期限なし、件数は上限まで）
+        self._post_time_cache: Dict[str, str] = {}
+
+        # オッズデータの保存設定（APIサーバーもこの値で保存するか判定する）
+        self.data_save_enabled = Config.ENABLE_DATA_SAVE
+        self._data_dir = Config.DATA_DIR
+
+        # 開いたままの保存オッズログ {race_id: ファイル}
+        self._open_logs: Dict = {}
+        self._log_lock = threading.Lock()
+
         # 蓄積系データプロバイダーの初期化（常に試みる）
         if Config.ENABLE_HISTORICAL_DATA:
             try:
                 logger.info("蓄積系データプロバイダーを初期化します")
+                from .historical_data_provider import HistoricalDataProvider
                 self.historical_provider = HistoricalDataProvider(
                     cache_dir=Config.HISTORICAL_CACHE_DIR,
                     service_key=Config.JRAVAN_SERVICE_KEY,
                     auto_fetch=Config.HISTORICAL_AUTO_FETCH
                 )
-                logger.info(f"蓄積系データプロバイダー初期化成功: {self.historical_provider.get_status()}")
-            except Exception as e:
-                logger.warning(f"蓄積系データプロバイダー初期化失敗: {e}")
-
-        # リアルタイムプロバイダーの初期化（JV-Link利用可能時のみ）
-        if JRAVAN_AVAILABLE:
-            try:
-                logger.info("リアルタイムデータプロバイダーを初期化します")
-                self._initialize_jravan()
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("蓄積系データプロバイダー初期化成功: %s", self.historical_provider.get_status())
             except Exception as e:
-                logger.warning(f"リアルタイムデータプロバイダー初期化失敗: {e}")
-
-        # モックプロバイダーの初期化（開発用）
-        if Config.USE_MOCK_DATA:
-            logger.info("モックプロバイダーを初期化します")
-            self.mock_provider = get_mock_provider(Config.MOCK_DATA_FILE)
-
-        # 初期化状態をログ出力
-        logger.info(f"データサービス初期化完了 - Historical: {self.historical_provider is not None}, "
-                   f"Realtime: {self.fetcher is not None}, Mock: {self.mock_provider is not None}")
+                logger.warning("蓄積系データプロバイダー初期化失敗: %s", e)
+
+        logger.info("データサービス初期化完了 - Historical: %s, Realtime: 遅延初期化, Mock: 遅延初期化",
+                    self.historical_provider is not None)
+
+    @property
+    def fetcher(self):
+        """リアルタイムプロバイダー（初回アクセス時にJV-Linkを初期化）"""
+        if not self._fetcher_loaded:
+            with self._lock:
+                if not self._fetcher_loaded:
+                    if jravan_available():
+                        try:
+                            logger.info("リアルタイムデータプロバイダーを初期化します")
+                            self._initialize_jravan()
+                        except Exception as e:
+                            logger.warning("リアルタイムデータプロバイダー初期化失敗: %s", e)
+                    self._fetcher_loaded = True
+        return self._fetcher
+
+    @property
+    def mock_provider(self):
+        """モックプロバイダー（初回アクセス時にモックデータを読み込み）"""
+        if not self._mock_loaded:
+            with self._lock:
+                if not self._mock_loaded:
+                    if Config.USE_MOCK_DATA:
+                        logger.info("モックプロバイダーを初期化します")
+                        from .mock_provider import get_mock_provider
+                        self._mock_provider = get_mock_provider(Config.MOCK_DATA_FILE)
+                    self._mock_loaded = True
+        return self._mock_provider
 
     def _initialize_jravan(self) -> bool:
         """JRA-VANを初期化"""
         try:
-            self.fetcher = JRAVANOddsFetcher(Config.JRAVAN_SERVICE_KEY)
-            if not self.fetcher.initialize():
+            fetcher = _jravan_fetcher_class()(Config.JRAVAN_SERVICE_KEY)
+            if not fetcher.initialize():
                 logger.error("JRA-VAN初期化に失敗しました")
                 return False
+            self._fetcher = fetcher
             logger.info("JRA-VAN初期化成功")
             return True
         except Exception as e:
-            logger.error(f"JRA-VAN初期化エラー: {e}")
+            logger.error("JRA-VAN初期化エラー: %s", e)
             return False
 
+    def _get_provider(self, source: str):
+        """
+        解決済みのデータソースに対応するプロバイダーを取得
+
+        Args:
+            source: 解決済みのデータソース ('historical', 'realtime', 'mock')
+
+        Returns:
+            プロバイダー
+
+        Raises:
+            ValueError: 不正なデータソースが指定された場合
+            RuntimeError: プロバイダーが初期化されていない場合
+        """
+        entry = _PROVIDERS.get(source)
+        if entry is None:
+            raise ValueError(f"不正なデータソース: {source}")
+
+        attr, label = entry
+        provider = getattr(self, attr)
+        if not provider:
+            raise RuntimeError(f"{label}が初期化されていません")
+        return provider
+
     def _resolve_data_source(self, data_source: str) -> str:
+        """
+        データソースを解決（解決結果はデータソースごとにキャッシュ）
+
+        プロバイダーの構成は初期化後に変わらないため、
+        'auto'の解決も初回のみ行う
+
+        Args:
+            data_source: 指定されたデータソース ('auto', 'historical', 'realtime', 'mock')
+
+        Returns:
+            str: 解決されたデータソース
+
+        Raises:
+            ValueError: 不正なデータソースが指定された場合
+            RuntimeError: 利用可能なデータプロバイダーがない場合
+        """
+        resolved = self._resolved_sources.get(data_source)
+        if resolved is None:
+            # 不正な値や解決失敗は例外になるためキャッシュされない
+            resolved = self._compute_data_source(data_source)
+            self._resolved_sources[data_source] = resolved
+        return resolved
+
+    def _compute_data_source(self, data_source: str) -> str:
         """
         データソースを解決
 
@@ -147,35 +344,24 @@ class DataService:
             # データソースの決定
             source = self._resolve_data_source(data_source)
 
-            if source == 'historical':
-                if not self.historical_provider:
-                    raise RuntimeError("蓄積系データプロバイダーが初期化されていません")
-                return self.historical_provider.get_race_info(date)
-            elif source == 'realtime':
-                if not self.fetcher:
-                    raise RuntimeError("リアルタイムデータプロバイダーが初期化されていません")
-                return self.fetcher.get_race_info(date)
-            elif source == 'mock':
-                if not self.mock_provider:
-                    raise RuntimeError("モックプロバイダーが初期化されていません")
-                return self.mock_provider.get_race_info(date)
-            else:
-                raise ValueError(f"不正なデータソース: {source}")
+            # 全プロバイダーが同じインターフェースを持つ
+            return self._get_provider(source).get_race_info(date)
 
         except ValueError as e:
             # バリデーションエラーは再スロー
-            logger.error(f"レース情報取得エラー: {e}")
+            logger.error("レース情報取得エラー: %s", e)
             raise
         except Exception as e:
             # その他のエラーはログに記録して空リストを返す
-            logger.error(f"レース情報取得エラー: {e}")
+            logger.error("レース情報取得エラー: %s", e)
             return []
 
     def get_realtime_odds(
         self,
         race_id: str,
         seconds_before_deadline: Optional[int] = None,
-        data_source: str = 'auto'
+        data_source: str = 'auto',
+        detail: bool = True
     ) -> Dict:
         """
         リアルタイムオッズを取得
@@ -184,59 +370,40 @@ class DataService:
             race_id: レースID
             seconds_before_deadline: 締め切りの何秒前のデータを取得するか（Noneの場合は最新）
             data_source: データソース ('auto', 'historical', 'realtime', 'mock')
+            detail: Falseの場合は表示用の説明（past_data_note, time_status など）を省略する
 
         Returns:
             Dict: オッズデータと締め切り情報
                 - odds: オッズデータのリスト
                 - deadline_info: 締め切り情報
                 - is_past_data: 過去データフラグ
-                - seconds_before_deadline: 指定された秒数
+                - seconds_before_deadline: 指定された秒数（detail=Trueの場合のみ）
         """
         try:
             # データソースの決定
             source = self._resolve_data_source(data_source)
 
             # 蓄積系データの場合、historical_providerに委譲
+            provider = self._get_provider(source)
             if source == 'historical':
-                if not self.historical_provider:
-                    raise RuntimeError("蓄積系データプロバイダーが初期化されていません")
-                return self.historical_provider.get_realtime_odds(
-                    race_id,
-                    seconds_before_deadline
-                )
+                return provider.get_realtime_odds(race_id, seconds_before_deadline, detail=detail)
 
             # post_timeを取得（無限再帰を避けるためデフォルト値を使用）
-            post_time = '10:00'
-
-            # mockモードの場合はpost_timeを取得
-            if source == 'mock' and self.mock_provider:
-                race_detail = self.mock_provider.get_race_detail(race_id)
-                if race_detail:
-                    post_time = race_detail.get('post_time', '10:00')
+            post_time = self._get_post_time(race_id, source) or '10:00'
 
             # 締め切り情報を取得
             deadline_info = TimeManager.get_deadline_info(race_id, post_time)
             is_past = deadline_info.get('is_past', False)
 
-            # オッズデータを取得
-            if source == 'mock':
-                if not self.mock_provider:
-                    raise RuntimeError("モックプロバイダーが初期化されていません")
-                odds_data = self.mock_provider.get_realtime_odds(race_id)
-            elif source == 'realtime':
-                if not self.fetcher:
-                    raise RuntimeError("リアルタイムデータプロバイダーが初期化されていません")
-                odds_data = self.fetcher.get_realtime_odds(race_id)
-            else:
-                raise ValueError(f"不正なデータソース: {source}")
+            # オッズデータを取得（mock / realtime）
+            odds_data = self._fetch_raw_odds(source, race_id)
 
             # n秒前のデータをシミュレート
             if seconds_before_deadline is not None and seconds_before_deadline > 0:
-                simulator = HistoricalOddsSimulator()
-                odds_data = [
-                    simulator.simulate_odds_at_time(odds, seconds_before_deadline)
-                    for odds in odds_data
-                ]
+                odds_data = self._simulator.simulate_odds_batch(odds_data, seconds_before_deadline)
+
+                if not detail:
+                    return {'odds': odds_data, 'deadline_info': deadline_info, 'is_past_data': True}
 
                 # 過去データフラグを明示
                 return {
@@ -248,6 +415,9 @@ class DataService:
                     'time_status': TimeManager.format_time_status(-seconds_before_deadline)
                 }
 
+            if not detail:
+                return {'odds': odds_data, 'deadline_info': deadline_info, 'is_past_data': is_past}
+
             # 現在のデータ
             result = {
                 'odds': odds_data,
@@ -268,17 +438,60 @@ class DataService:
 
         except ValueError as e:
             # バリデーションエラーは再スロー
-            logger.error(f"オッズ取得エラー: {e}")
+            logger.error("オッズ取得エラー: %s", e)
             raise
         except Exception as e:
             # その他のエラーはログに記録してエラー情報を返す
-            logger.error(f"オッズ取得エラー: {e}")
+            logger.error("オッズ取得エラー: %s", e)
             return {
                 'odds': [],
                 'error': str(e),
                 'is_past_data': False
             }
 
+    def _fetch_raw_odds(self, source: str, race_id: str) -> List[Dict]:
+        """
+        締め切り情報やシミュレーションを付けずにオッズデータを取得（mock / realtime）
+
+        Args:
+            source: 解決済みのデータソース ('realtime', 'mock')
+            race_id: レースID
+
+        Returns:
+            List[Dict]: オッズデータのリスト
+        """
+        return self._get_provider(source).get_realtime_odds(race_id)
+
+    def _get_post_time(self, race_id: str, source: str) -> Optional[str]:
+        """
+        発走時刻を取得（キャッシュ付き）
+
+        Args:
+            race_id: レースID
+            source: 解決済みのデータソース
+
+        Returns:
+            Optional[str]: 発走時刻 (HH:MM形式)、取得できない場合はNone
+        """
+        post_time = self._post_time_cache.get(race_id)
+        if post_time is not None:
+            return post_time
+
+        # mockモードのみレース詳細から発走時刻を取得できる
+        if source != 'mock' or not self.mock_provider:
+            return None
+
+        race_detail = self.mock_provider.get_race_detail(race_id)
+        if not race_detail:
+            return None
+
+        post_time = race_detail.get('post_time', '10:00')
+        if len(self._post_time_cache) >= _POST_TIME_CACHE_MAXSIZE:
+            # 最も古いエントリを削除
+            del self._post_time_cache[next(iter(self._post_time_cache))]
+        self._post_time_cache[race_id] = post_time
+        return post_time
+
     def get_race_detail(self, race_id: str, data_source: str = 'auto') -> Optional[Dict]:
         """
         レース詳細情報を取得
@@ -294,17 +507,9 @@ class DataService:
             # データソースの決定
             source = self._resolve_data_source(data_source)
 
-            if source == 'historical':
-                if not self.historical_provider:
-                    raise RuntimeError("蓄積系データプロバイダーが初期化されていません")
-                return self.historical_provider.get_race_detail(race_id)
-            elif source == 'mock':
-                if not self.mock_provider:
-                    raise RuntimeError("モックプロバイダーが初期化されていません")
-                return self.mock_provider.get_race_detail(race_id)
-            elif source == 'realtime':
-                # 本番環境の場合、オッズデータから情報を抽出
-                odds_data = self.get_realtime_odds(race_id, data_source=source)
+            if source == 'realtime':
+                # 本番環境の場合、オッズデータから情報を抽出（締め切り情報は不要）
+                odds_data = self._fetch_raw_odds(source, race_id)
                 if odds_data:
                     return {
                         'race_id': race_id,
@@ -312,15 +517,15 @@ class DataService:
                         'odds': odds_data
                     }
                 return None
-            else:
-                raise ValueError(f"不正なデータソース: {source}")
+
+            return self._get_provider(source).get_race_detail(race_id)
         except ValueError as e:
             # バリデーションエラーは再スロー
-            logger.error(f"レース詳細取得エラー: {e}")
+            logger.error("レース詳細取得エラー: %s", e)
             raise
         except Exception as e:
             # その他のエラーはログに記録してNoneを返す
-            logger.error(f"レース詳細取得エラー: {e}")
+            logger.error("レース詳細取得エラー: %s", e)
             return None
 
     def save_odds_data(self, race_id: str, odds_data: List[Dict]):
@@ -331,34 +536,32 @@ class DataService:
             race_id: レースID
             odds_data: オッズデータ
         """
-        if not Config.ENABLE_DATA_SAVE:
+        if not self.data_save_enabled:
             return
 
         try:
-            data_dir = Path(Config.DATA_DIR)
-            data_dir.mkdir(parents=True, exist_ok=True)
-
             # 日付ごとにディレクトリを分ける
-            date = race_id[:8]
-            date_dir = data_dir / date
-            date_dir.mkdir(parents=True, exist_ok=True)
+            date_dir = _ensure_date_dir(self._data_dir, race_id[:8])
 
-            # タイムスタンプ付きで保存
-            timestamp = datetime.now().strftime("%H%M%S")
-            filename = f"{race_id}_{timestamp}.json"
-            filepath = date_dir / filename
+            # レースごとのログにタイムスタンプ付きで追記
+            payload = jsonutil.dumps({
+                'race_id': race_id,
+                'timestamp': datetime.now().isoformat(),
+                'odds': odds_data
+            }, indent=False)
+            frame_len = _FRAME_LEN.pack(len(payload))
 
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'race_id': race_id,
-                    'timestamp': datetime.now().isoformat(),
-                    'odds': odds_data
-                }, f, ensure_ascii=False, indent=2)
+            with self._log_lock:
+                log_file = self._get_odds_log(race_id, date_dir)
+                log_file.write(frame_len + payload + frame_len)
+                log_file.flush()
 
-            logger.info(f"オッズデータを保存しました: {filepath}")
+            logger.info("オッズデータを保存しました: %s", log_file.name)
 
         except Exception as e:
-            logger.error(f"オッズデータ保存エラー: {e}")
+            # ディレクトリが削除された場合に備えて作成済みキャッシュを破棄
+            _ensure_date_dir.cache_clear()
+            logger.error("オッズデータ保存エラー: %s", e)
 
     def load_saved_odds(self, race_id: str, timestamp: Optional[str] = None) -> Optional[List[Dict]]:
         """
@@ -372,36 +575,83 @@ class DataService:
             Optional[List[Dict]]: オッズデータ
         """
         try:
-            data_dir = Path(Config.DATA_DIR)
-            date = race_id[:8]
-            date_dir = data_dir / date
+            date_dir = _date_dir(self._data_dir, race_id[:8])
 
-            if not date_dir.exists():
+            # レースごとのログから最新レコードを読み込み
+            # （事前のexists()は行わず、ファイルやディレクトリがなければ例外で判定）
+            try:
+                payload = _read_last_frame(date_dir / f"{race_id}{ODDS_LOG_SUFFIX}")
+            except FileNotFoundError:
+                payload = None
+            if payload is not None:
+                return jsonutil.loads(payload).get('odds', [])
+
+            # 旧形式（スナップショットごとのJSONファイル）の最新ファイルを検索
+            # ファイル名の時刻（HHMMSS）で比較するためstatは不要
+            prefix = f"{race_id}_"
+            latest = None
+            try:
+                with os.scandir(date_dir) as it:
+                    for entry in it:
+                        name = entry.name
+                        if name.startswith(prefix) and name.endswith('.json') and (latest is None or name > latest):
+                            latest = name
+            except FileNotFoundError:
                 return None
 
-            # 該当レースのファイルを検索
-            pattern = f"{race_id}_*.json"
-            files = sorted(date_dir.glob(pattern), reverse=True)
-
-            if not files:
+            if latest is None:
                 return None
 
-            # 最新のファイルを読み込み
-            with open(files[0], 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(date_dir / latest, 'rb') as f:
+                data = jsonutil.loads(f.read())
                 return data.get('odds', [])
 
         except Exception as e:
-            logger.error(f"保存データ読み込みエラー: {e}")
+            logger.error("保存データ読み込みエラー: %s", e)
             return None
 
+    def _get_odds_log(self, race_id: str, date_dir: Path):
+        """
+        レースの保存オッズログを追記モードで取得（開いたハンドルを再利用）
+
+        呼び出し側で_log_lockを保持していること
+
+        Args:
+            race_id: レースID
+            date_dir: 日付ディレクトリ
+
+        Returns:
+            追記用のファイルオブジェクト
+        """
+        log_file = self._open_logs.get(race_id)
+        if log_file is None:
+            # 開きすぎないよう最も古いハンドルを閉じる
+            if len(self._open_logs) >= _MAX_OPEN_LOGS:
+                oldest = next(iter(self._open_logs))
+                self._open_logs.pop(oldest).close()
+            log_file = open(date_dir / f"{race_id}{ODDS_LOG_SUFFIX}", 'ab')
+            self._open_logs[race_id] = log_file
+        return log_file
+
     def close(self):
         """リソースの解放"""
-        if self.fetcher:
+        self._post_time_cache.clear()
+        self._resolved_sources.clear()
+        with self._log_lock:
+            for log_file in self._open_logs.values():
+                try:
+                    log_file.close()
+                except Exception:
+                    pass
+            self._open_logs.clear()
+        if self._fetcher:
             try:
-                self.fetcher.close()
+                self._fetcher.close()
             except:
                 pass
+        # JV-Linkは次回アクセス時に（その時点のワーカースレッドで）初期化し直す
+        self._fetcher = None
+        self._fetcher_loaded = False
         if self.historical_provider:
             try:
                 self.historical_provider.close()
@@ -411,8 +661,8 @@ class DataService:
     def get_status(self) -> Dict:
         """サービスの状態を取得"""
         status = {
-            'jravan_available': JRAVAN_AVAILABLE,
-            'data_save_enabled': Config.ENABLE_DATA_SAVE,
+            'jravan_available': jravan_available(),
+            'data_save_enabled': self.data_save_enabled,
             'cache_enabled': Config.ENABLE_CACHE,
             'default_data_source': Config.DEFAULT_DATA_SOURCE,
             'environment': Config.ENVIRONMENT
@@ -421,8 +671,8 @@ class DataService:
         # 各プロバイダーの初期化状態
         status['providers'] = {
             'historical': self.historical_provider is not None,
-            'realtime': self.fetcher is not None,
-            'mock': self.mock_provider is not None
+            'realtime': self._fetcher is not None,
+            'mock': self._mock_provider is not None
         }
 
         # 蓄積系データプロバイダーのステータス
@@ -434,6 +684,7 @@ class DataService:
 
 # グローバルインスタンス
 _data_service = None
+_data_service_lock = threading.Lock()
 
 
 def get_data_service() -> DataService:
@@ -445,7 +696,9 @@ def get_data_service() -> DataService:
     """
     global _data_service
     if _data_service is None:
-        _data_service = DataService()
+        with _data_service_lock:
+            if _data_service is None:
+                _data_service = DataService()
     return _data_service
 
 
@@ -6,7 +6,13 @@
 """
 
 import logging
-from typing import Dict, List, Optional
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
 from .historical_fetcher import HistoricalOddsFetcher
@@ -16,6 +22,164 @@ from .odds_parser import parse_odds_record
 
 logger = logging.getLogger(__name__)
 
+# これ以上のJGレコード数ならプロセスプールでパースする（少量ではプロセス起動のほうが高くつく）
+_PARALLEL_PARSE_THRESHOLD = 20000
+_PARALLEL_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+
+# レース情報を含むレコードID
+_RACE_RECORD_IDS = frozenset(('RA', 'H1', 'H6', 'JG'))
+
+# レース情報レコードのフィールド位置（0始まり、文字単位）
+_RACE_ID_SLICE = slice(11, 27)      # レースID（16桁）
+_RACE_NAME_SLICE = slice(112, 162)  # レース名（RAのみ）
+
+# 読み込んだキャッシュデータをメモリに保持する期間と最大件数
+_MEM_CACHE_TTL = 30.0  # 秒
+_MEM_CACHE_MAXSIZE = 1024
+
+
+def _parse_jg_race_info(raw_data: str, race_id: str, record_id: str) -> Optional[Dict]:
+    """
+    JGレコード（時系列オッズ情報）からレース情報を取り出す
+
+    JG[2] + データ区分[1] + 年月日[8] + レースID[16] + ...
+    位置: 0-1=JG, 2=データ区分, 3-10=年月日, 11-26=レースID
+
+    Args:
+        raw_data: 生データ
+        race_id: レースID
+        record_id: レコードID
+
+    Returns:
+        Optional[Dict]: レース情報
+    """
+    return {
+        'race_id': race_id,
+        'race_name': '',  # JGレコードにはレース名がない
+        'post_time': '10:00',  # デフォルト値
+        'record_id': record_id,
+        'raw_data': raw_data
+    }
+
+
+def _parse_h1_race_info(raw_data: str, race_id: str, record_id: str) -> Optional[Dict]:
+    """
+    H1/H6レコード（馬毎レース情報）からレース情報を取り出す
+
+    H1[2] + データ区分[1] + 年月日[8] + レースID[16] + ...
+    位置: 0-1=H1, 2=データ区分, 3-10=年月日, 11-26=レースID
+
+    Args:
+        raw_data: 生データ
+        race_id: レースID
+        record_id: レコードID
+
+    Returns:
+        Optional[Dict]: レース情報
+    """
+    return {
+        'race_id': race_id,
+        'race_name': '',  # H1レコードにはレース名がない
+        'record_id': record_id,
+        'raw_data': raw_data
+    }
+
+
+def _parse_ra_race_info(raw_data: str, race_id: str, record_id: str) -> Optional[Dict]:
+    """
+    RAレコード（レース詳細）からレース情報を取り出す
+
+    Args:
+        raw_data: 生データ
+        race_id: レースID
+        record_id: レコードID（未対応のレコードIDもRAとして扱う）
+
+    Returns:
+        Optional[Dict]: レース情報、データが短すぎる場合はNone
+    """
+    size = len(raw_data)
+    if size < 50:
+        return None
+
+    # レース名: 位置112-162（推定）
+    race_name = raw_data[_RACE_NAME_SLICE].strip() if size > 162 else ""
+
+    return {
+        'race_id': race_id,
+        'race_name': race_name,
+        'record_id': 'RA',
+        'raw_data': raw_data
+    }
+
+
+# レコードIDごとのレース情報パーサー（該当しないレコードIDはRAとして扱う）
+_RACE_INFO_PARSERS = {
+    'JG': _parse_jg_race_info,
+    'H1': _parse_h1_race_info,
+    'H6': _parse_h1_race_info,
+    'RA': _parse_ra_race_info,
+}
+
+
+def _group_jg_records(buffers: List[str]) -> Dict[str, List[Dict]]:
+    """
+    JGレコードをパースしてレースIDごとにグループ化
+
+    プロセスプールから呼び出せるようモジュールレベルに定義
+
+    Args:
+        buffers: JGレコードの生データのリスト
+
+    Returns:
+        Dict[str, List[Dict]]: レースIDごとのパース結果
+    """
+    odds_by_race = defaultdict(list)
+    parse = parse_odds_record
+    # 正常にパースできたJGレコードには必ずrace_idが含まれる
+    get_race_id = itemgetter('race_id')
+    # 同じチャンクのレコードには同じパース時刻を付ける
+    parsed_at = datetime.now().isoformat()
+    for buff in buffers:
+        parsed = parse('JG', buff, parsed_at)
+        if parsed and 'error' not in parsed:
+            race_id = get_race_id(parsed)
+            if race_id:
+                odds_by_race[race_id].append(parsed)
+    return odds_by_race
+
+
+def _group_jg_records_parallel(buffers: List[str]) -> Dict[str, List[Dict]]:
+    """
+    JGレコードのパースを件数に応じて複数プロセスに分割
+
+    連続したチャンクに分けて順番にマージするため、レースごとの並び順は維持される
+
+    Args:
+        buffers: JGレコードの生データのリスト
+
+    Returns:
+        Dict[str, List[Dict]]: レースIDごとのパース結果
+    """
+    workers = _PARALLEL_PARSE_WORKERS
+    if len(buffers) < _PARALLEL_PARSE_THRESHOLD or workers < 2:
+        return _group_jg_records(buffers)
+
+    size = -(-len(buffers) // workers)
+    chunks = [buffers[i:i + size] for i in range(0, len(buffers), size)]
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_group_jg_records, chunks))
+    except Exception as e:
+        logger.warning(f"Parallel JG parsing failed, falling back to single process: {e}")
+        return _group_jg_records(buffers)
+
+    odds_by_race = defaultdict(list)
+    for result in results:
+        for race_id, odds_list in result.items():
+            odds_by_race[race_id].extend(odds_list)
+    return odds_by_race
+
 
 class HistoricalDataProvider:
     """開発モード用のデータプロバイダー"""
@@ -40,6 +204,42 @@ class HistoricalDataProvider:
         self.auto_fetch = auto_fetch
         self.fetcher_initialized = False
 
+        # 過去オッズシミュレーター（状態を持たないため共有する）
+        self._simulator = HistoricalOddsSimulator()
+
+        # 読み込み済みキャッシュデータ {race_id: (読み込み時刻, データ)}
+        self._mem_cache: Dict[str, Tuple[float, Dict]] = {}
+
+    def _load_cached(self, race_id: str) -> Optional[Dict]:
+        """
+        キャッシュデータを読み込み（一定時間はメモリ上のデータを再利用）
+
+        Args:
+            race_id: レースID
+
+        Returns:
+            Optional[Dict]: キャッシュされたデータ、存在しない場合はNone
+        """
+        now = time.monotonic()
+        entry = self._mem_cache.get(race_id)
+        if entry is not None and now - entry[0] < _MEM_CACHE_TTL:
+            return entry[1]
+
+        data = self.cache.load_odds(race_id)
+        if data is None:
+            self._mem_cache.pop(race_id, None)
+            return None
+
+        if len(self._mem_cache) >= _MEM_CACHE_MAXSIZE:
+            # 期限切れを削除し、それでも満杯なら最も古いエントリを削除
+            for expired in [k for k, (ts, _) in self._mem_cache.items() if now - ts >= _MEM_CACHE_TTL]:
+                del self._mem_cache[expired]
+            if len(self._mem_cache) >= _MEM_CACHE_MAXSIZE:
+                del self._mem_cache[next(iter(self._mem_cache))]
+
+        self._mem_cache[race_id] = (now, data)
+        return data
+
     def _ensure_fetcher(self) -> bool:
         """フェッチャーの初期化を確保"""
         if self.fetcher_initialized:
@@ -73,65 +273,71 @@ class HistoricalDataProvider:
 
         if cached_races:
             logger.info(f"Found {len(cached_races)} races in cache")
+            # 日付ごとのインデックスからレース情報をまとめて読み込む
+            race_infos = self.cache.load_race_infos(date)
             races = []
             for race_id in cached_races:
-                cached_data = self.cache.load_odds(race_id)
-                if cached_data and cached_data.get('race_info'):
-                    race_info = cached_data['race_info']
-                    race_info['race_id'] = race_id
-                    races.append(race_info)
+                race_info = race_infos.get(race_id)
+                if race_info:
+                    races.append({**race_info, 'race_id': race_id})
             return races
 
         # キャッシュにない場合、フェッチャーで取得
         if self.auto_fetch and self._ensure_fetcher():
             logger.info(f"Cache miss for {date}, fetching race data from JV-Link")
 
-            # レース情報を取得
-            raw_data = self.fetcher.get_race_data(date)
-            races = []
+            # レース情報を1レコードずつ読みながら、レース抽出とJGレコードの収集を同時に行う
             race_dict = {}
-
-            # レコードIDの統計を取る
-            record_id_counts = {}
-            for data in raw_data:
-                rid = data['record_id']
-                record_id_counts[rid] = record_id_counts.get(rid, 0) + 1
-                # レースレコードを処理（RA, H1, H6, JG）
-                if data['record_id'] in ['RA', 'H1', 'H6', 'JG']:
-                    race_info = self._parse_race_info(data['raw_data'], data['record_id'])
-                    if race_info:
-                        race_id = race_info.get('race_id')
-                        if race_id and race_id not in race_dict:  # 重複を避ける
-                            races.append(race_info)
-                            race_dict[race_id] = race_info
-
-            logger.info(f"Record ID counts: {record_id_counts}")
+            jg_buffers = []
+            record_id_counts = Counter()
+
+            parse_race_info = self._parse_race_info
+            try:
+                for record_id, buff in self.fetcher.iter_race_data(date):
+                    # レコードIDの統計を取る
+                    record_id_counts[record_id] += 1
+                    # レースレコードを処理（RA, H1, H6, JG）
+                    if record_id in _RACE_RECORD_IDS:
+                        if record_id == 'JG':
+                            jg_buffers.append(buff)
+                        # 登録済みのレース（H1・JGは同一レースに多数ある）はパースしない
+                        if buff[_RACE_ID_SLICE].strip() in race_dict:
+                            continue
+                        race_info = parse_race_info(buff, record_id)
+                        if race_info:
+                            race_id = race_info.get('race_id')
+                            if race_id and race_id not in race_dict:  # 重複を避ける
+                                race_dict[race_id] = race_info
+            except Exception as e:
+                logger.error(f"Data fetch error for {date}: {e}")
+                return []
+
+            # 挿入順は最初に出現した順なので、そのままレース一覧になる
+            races = list(race_dict.values())
+
+            logger.info(f"Record ID counts: {dict(record_id_counts)}")
             logger.info(f"Parsed {len(races)} unique races")
 
             # JGレコードからオッズデータも抽出してキャッシュに保存
             if races:
-                logger.info(f"Extracting odds data from {len(raw_data)} JG records")
+                logger.info(f"Extracting odds data from {len(jg_buffers)} JG records")
 
                 # レースIDごとにグループ化（JGレコードから）
-                odds_by_race = {}
-                for data in raw_data:
-                    if data['record_id'] == 'JG':
-                        parsed = parse_odds_record(data['record_id'], data['raw_data'])
-                        if parsed and not parsed.get('error'):
-                            race_id = parsed.get('race_id', '')
-                            if race_id:
-                                if race_id not in odds_by_race:
-                                    odds_by_race[race_id] = []
-                                odds_by_race[race_id].append(parsed)
-
-                # キャッシュに保存
+                odds_by_race = _group_jg_records_parallel(jg_buffers)
+
+                # キャッシュに保存（インデックスの書き込みは1日分で1回）
+                entries = []
                 for race_id, odds_list in odds_by_race.items():
                     race_info = race_dict.get(race_id, {})
                     # post_timeをrace_infoから取得
                     if not race_info.get('post_time') and odds_list:
                         race_info['post_time'] = odds_list[0].get('post_time', '10:00')
-                    self.cache.save_odds(race_id, odds_list, race_info)
-                    logger.info(f"Cached {len(odds_list)} odds records for race {race_id}")
+                    entries.append((race_id, odds_list, race_info))
+
+                saved_count = self.cache.save_many(entries)
+                for race_id in odds_by_race:
+                    self._mem_cache.pop(race_id, None)
+                logger.info(f"Cached odds records for {saved_count}/{len(odds_by_race)} races")
 
             return races
 
@@ -153,58 +359,11 @@ class HistoricalDataProvider:
             if len(raw_data) < 30:
                 return None
 
-            # JGレコード（時系列オッズ情報）の場合
-            if record_id == 'JG':
-                # JGレコードフォーマット:
-                # JG[2] + データ区分[1] + 年月日[8] + レースID[16] + ...
-                # 位置: 0-1=JG, 2=データ区分, 3-10=年月日, 11-26=レースID
-                if len(raw_data) < 27:
-                    return None
+            # 30文字以上あるため、レースID（位置11-26）は常に取り出せる
+            race_id = raw_data[_RACE_ID_SLICE].strip()
 
-                race_id = raw_data[11:27].strip() if len(raw_data) > 27 else ""
-
-                return {
-                    'race_id': race_id,
-                    'race_name': '',  # JGレコードにはレース名がない
-                    'post_time': '10:00',  # デフォルト値
-                    'record_id': record_id,
-                    'raw_data': raw_data
-                }
-
-            # H1レコード（馬毎レース情報）の場合
-            elif record_id in ['H1', 'H6']:
-                # H1レコードフォーマット:
-                # H1[2] + データ区分[1] + 年月日[8] + レースID[16] + ...
-                # 位置: 0-1=H1, 2=データ区分, 3-10=年月日, 11-26=レースID
-                if len(raw_data) < 27:
-                    return None
-
-                race_id = raw_data[11:27].strip() if len(raw_data) > 27 else ""
-
-                return {
-                    'race_id': race_id,
-                    'race_name': '',  # H1レコードにはレース名がない
-                    'record_id': record_id,
-                    'raw_data': raw_data
-                }
-
-            # RAレコード（レース詳細）の場合
-            else:
-                if len(raw_data) < 50:
-                    return None
-
-                # レースID: 位置11-26
-                race_id = raw_data[11:27].strip() if len(raw_data) > 27 else ""
-
-                # レース名: 位置112-162（推定）
-                race_name = raw_data[112:162].strip() if len(raw_data) > 162 else ""
-
-                return {
-                    'race_id': race_id,
-                    'race_name': race_name,
-                    'record_id': 'RA',
-                    'raw_data': raw_data
-                }
+            parse = _RACE_INFO_PARSERS.get(record_id, _parse_ra_race_info)
+            return parse(raw_data, race_id, record_id)
 
         except Exception as e:
             logger.error(f"Failed to parse race info ({record_id}): {e}")
@@ -213,7 +372,8 @@ class HistoricalDataProvider:
     def get_realtime_odds(
         self,
         race_id: str,
-        seconds_before_deadline: Optional[int] = None
+        seconds_before_deadline: Optional[int] = None,
+        detail: bool = True
     ) -> Dict:
         """
         過去のオッズデータを取得
@@ -221,6 +381,7 @@ class HistoricalDataProvider:
         Args:
             race_id: レースID
             seconds_before_deadline: 締め切り前の秒数（Noneの場合は最新）
+            detail: Falseの場合は表示用の説明（past_data_note, time_status など）を省略する
 
         Returns:
             Dict: オッズデータと締め切り情報
@@ -228,7 +389,7 @@ class HistoricalDataProvider:
         logger.info(f"Getting odds for race: {race_id}, seconds_before: {seconds_before_deadline}")
 
         # キャッシュから取得
-        cached_data = self.cache.load_odds(race_id)
+        cached_data = self._load_cached(race_id)
 
         if not cached_data:
             # キャッシュにない場合
@@ -256,24 +417,20 @@ class HistoricalDataProvider:
             # 時系列データがある場合
             if cached_data.get('data_type') == 'time_series':
                 odds_timeline = cached_data.get('odds_timeline', [])
-                simulator = HistoricalOddsSimulator()
+                simulator = self._simulator
                 target_odds = simulator.get_odds_at_time(odds_timeline, seconds_before_deadline)
 
                 if target_odds:
                     odds_data = target_odds
                 else:
                     # 時系列データから取得できない場合、シミュレート
-                    odds_data = [
-                        simulator.simulate_odds_at_time(odds, seconds_before_deadline)
-                        for odds in odds_data
-                    ]
+                    odds_data = simulator.simulate_odds_batch(odds_data, seconds_before_deadline)
             else:
                 # 通常のキャッシュデータの場合、シミュレート
-                simulator = HistoricalOddsSimulator()
-                odds_data = [
-                    simulator.simulate_odds_at_time(odds, seconds_before_deadline)
-                    for odds in odds_data
-                ]
+                odds_data = self._simulator.simulate_odds_batch(odds_data, seconds_before_deadline)
+
+            if not detail:
+                return {'odds': odds_data, 'deadline_info': deadline_info, 'is_past_data': True}
 
             return {
                 'odds': odds_data,
@@ -285,6 +442,9 @@ class HistoricalDataProvider:
                 'time_status': TimeManager.format_time_status(-seconds_before_deadline)
             }
 
+        if not detail:
+            return {'odds': odds_data, 'deadline_info': deadline_info, 'is_past_data': True}
+
         # 指定なしの場合は最新（締め切り直前）のデータ
         return {
             'odds': odds_data,
@@ -309,31 +469,27 @@ class HistoricalDataProvider:
             # 日付を抽出
             date = race_id[:8]
 
-            # オッズデータを取得
-            raw_data = self.fetcher.get_odds_data(date)
-
-            if not raw_data:
-                logger.warning(f"No odds data fetched for {race_id}")
-                return None
-
-            # パースして保存
+            # オッズデータを1レコードずつ読みながらパース
             odds_list = []
-            for data in raw_data:
-                parsed = parse_odds_record(data['record_id'], data['raw_data'])
+            parsed_at = datetime.now().isoformat()
+            for record_id, buff in self.fetcher.iter_odds_data(date):
+                parsed = parse_odds_record(record_id, buff, parsed_at)
                 if parsed:
                     odds_list.append(parsed)
 
-            if odds_list:
-                # キャッシュに保存
-                self.cache.save_odds(race_id, odds_list)
+            if not odds_list:
+                logger.warning(f"No odds data fetched for {race_id}")
+                return None
 
-                return {
-                    'race_id': race_id,
-                    'odds': odds_list,
-                    'race_info': {}
-                }
+            # キャッシュに保存
+            self.cache.save_odds(race_id, odds_list)
+            self._mem_cache.pop(race_id, None)
 
-            return None
+            return {
+                'race_id': race_id,
+                'odds': odds_list,
+                'race_info': {}
+            }
 
         except Exception as e:
             logger.error(f"Failed to fetch and cache odds: {e}")
@@ -352,6 +508,7 @@ class HistoricalDataProvider:
         if not self._ensure_fetcher():
             return False
 
+        self._mem_cache.pop(race_id, None)
         result = self._fetch_and_cache_odds(race_id)
         return result is not None
 
@@ -365,7 +522,7 @@ class HistoricalDataProvider:
         Returns:
             Optional[Dict]: レース詳細
         """
-        cached_data = self.cache.load_odds(race_id)
+        cached_data = self._load_cached(race_id)
 
         if cached_data:
             return {
@@ -380,8 +537,13 @@ class HistoricalDataProvider:
 
     def close(self):
         """リソースの解放"""
+        self._mem_cache.clear()
+        self.cache.close()
         if self.fetcher:
             self.fetcher.close()
+        # 次回の自動取得時に初期化し直す
+        self.fetcher = None
+        self.fetcher_initialized = False
 
     def get_status(self) -> Dict:
         """
@@ -5,15 +5,66 @@ JVOpenを使用して過去のオッズデータを取得します。
 32bit Pythonが必要です。
 """
 
-import win32com.client
 import logging
 import time
-from typing import List, Dict, Optional, Tuple
+from itertools import islice
+from typing import Iterable, Iterator, List, Dict, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from .jvlink import dispatch, iter_buffers
+
+# 待機中にCOMメッセージを処理するため（Windowsのみ）
+try:
+    import pythoncom
+    import win32event
+    MESSAGE_PUMP_AVAILABLE = True
+except ImportError:
+    MESSAGE_PUMP_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# ダウンロード完了待ちのポーリング間隔（秒）
+# 進捗がない間は間隔を伸ばし、進捗があれば最短間隔に戻す
+_DOWNLOAD_POLL_MIN = 0.05
+_DOWNLOAD_POLL_MAX = 1.0
+_DOWNLOAD_POLL_BACKOFF = 1.5
+
+
+def _wait_pumping_messages(seconds: float):
+    """
+    COMメッセージを処理しながら待機
+
+    JV-LinkはSTAのCOMオブジェクトのため、待機中もメッセージを処理しないと
+    ダウンロード処理が進まないことがある。メッセージが届いた時点で処理し、
+    残り時間だけ再び待つ
+
+    Args:
+        seconds: 待機する秒数
+    """
+    if not MESSAGE_PUMP_AVAILABLE:
+        time.sleep(seconds)
+        return
+
+    deadline = time.monotonic() + seconds
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        ret = win32event.MsgWaitForMultipleObjects(
+            [], False, max(1, int(remaining * 1000)), win32event.QS_ALLEVENTS
+        )
+        # 待機対象のハンドルがないため、WAIT_OBJECT_0はメッセージの到着を表す
+        if ret == win32event.WAIT_OBJECT_0:
+            pythoncom.PumpWaitingMessages()
+
+
+class JVRecord(NamedTuple):
+    """JV-Linkから読み込んだ1レコード（レコードごとに辞書を作らないためタプルで保持）"""
+    record_id: str
+    raw_data: str
+    length: int
+
 
 class HistoricalOddsFetcher:
     """JRA-VANから蓄積系データを取得するクラス"""
@@ -30,6 +81,9 @@ class HistoricalOddsFetcher:
     DATASPEC_0B30 = "0B30"          # 速報オッズ（全賭式: O1〜O6全て）
     DATASPEC_0B31 = "0B31"          # 速報オッズ（単勝のみ: O1）
 
+    # オッズとしてパースできるレコードID（odds_parser.parse_odds_recordの対応範囲）
+    ODDS_RECORD_IDS = frozenset(('O1', 'O2', 'O3', 'O4', 'O5', 'O6', 'JG'))
+
     # オプション
     OPTION_NORMAL = 1               # 通常データ取得
     OPTION_SETUP = 3                # セットアップ（初回）
@@ -59,7 +113,7 @@ class HistoricalOddsFetcher:
         """
         try:
             # JV-LinkのCOMオブジェクトを作成
-            self.jvlink = win32com.client.Dispatch('JVDTLab.JVLink')
+            self.jvlink = dispatch(self._report_dispatch_fallback)
 
             # 初期化
             ret = self.jvlink.JVInit(self.service_key)
@@ -78,6 +132,36 @@ class HistoricalOddsFetcher:
             logger.error(f"Initialization error: {e}")
             return False
 
+    def _wait_for_download(self, downloadcount: int) -> bool:
+        """
+        JVOpenで開始したダウンロードの完了を待つ
+
+        Args:
+            downloadcount: ダウンロードするファイル数
+
+        Returns:
+            bool: ダウンロードが完了した場合True、エラーの場合False
+        """
+        logger.info(f"Waiting for download to complete ({downloadcount} files)...")
+        jvstatus = self.jvlink.JVStatus
+        delay = _DOWNLOAD_POLL_MIN
+        prev_status = 0
+        while True:
+            status = jvstatus()
+            if status < 0:
+                logger.error(f"JVStatus error: {status}")
+                return False
+            if status >= downloadcount:
+                logger.info("Download completed")
+                return True
+
+            if status != prev_status:
+                # 進捗があった場合は次の完了もすぐ検知できるよう間隔を戻す
+                delay = _DOWNLOAD_POLL_MIN
+                prev_status = status
+            _wait_pumping_messages(delay)
+            delay = min(delay * _DOWNLOAD_POLL_BACKOFF, _DOWNLOAD_POLL_MAX)
+
     def setup_database(
         self,
         start_date: str,
@@ -130,37 +214,16 @@ class HistoricalOddsFetcher:
             if isinstance(ret, tuple) and len(ret) > 2:
                 downloadcount = ret[2]
                 if downloadcount > 0:
-                    logger.info(f"Waiting for download to complete ({downloadcount} files)...")
-                    while True:
-                        status = self.jvlink.JVStatus()
-                        if status < 0:
-                            logger.error(f"JVStatus error: {status}")
-                            break
-                        if status >= downloadcount:
-                            logger.info("Download completed")
-                            break
-                        time.sleep(2)
+                    self._wait_for_download(downloadcount)
 
             # データを読み込み（進捗確認用）
+            # ログレベルは読み込み中に変わらないため、最初に1回だけ判定する
+            log_progress = logger.isEnabledFor(logging.INFO)
             total_records = 0
-            while True:
-                ret = self.jvlink.JVRead("", 102890, "")
-
-                if isinstance(ret, tuple):
-                    returncode = ret[0]
-                else:
-                    returncode = ret
-
-                if returncode == 0:
-                    break
-
-                if returncode < 0:
-                    logger.warning(f"JVRead error during setup: {returncode}")
-                    break
-
+            for _ in iter_buffers(self.jvlink, self._report_read_error):
                 total_records += 1
 
-                if total_records % 100 == 0:
+                if log_progress and total_records % 100 == 0:
                     logger.info(f"Setup progress: {total_records} records processed")
 
             # Close
@@ -178,8 +241,9 @@ class HistoricalOddsFetcher:
         start_date: str,
         dataspec: str = DATASPEC_RACE_INFO,
         option: int = OPTION_NORMAL,
-        max_records: Optional[int] = None
-    ) -> List[Dict]:
+        max_records: Optional[int] = None,
+        record_ids: Optional[Iterable[str]] = None
+    ) -> List[JVRecord]:
         """
         蓄積系データを取得
 
@@ -188,103 +252,145 @@ class HistoricalOddsFetcher:
             dataspec: データ種別
             option: オプション (1=通常, 3=セットアップ)
             max_records: 最大取得レコード数（Noneの場合は全件）
+            record_ids: 取得するレコードID（Noneの場合は全て）
 
         Returns:
-            List[Dict]: 取得したデータのリスト
+            List[JVRecord]: 取得したレコードのリスト
         """
-        if not self.is_initialized:
-            logger.error("JV-Link not initialized")
+        try:
+            data_list = list(self.iter_data(start_date, dataspec, option, max_records, record_ids))
+        except Exception as e:
+            logger.error(f"Data fetch error: {e}")
             return []
 
-        data_list = []
+        logger.info(f"Data fetch completed. Total records: {len(data_list)}")
+        return data_list
 
-        try:
-            # fromtimeをYYYYMMDDhhmmss形式に変換
-            fromtime = start_date + "000000" if len(start_date) == 8 else start_date
+    def iter_data(
+        self,
+        start_date: str,
+        dataspec: str = DATASPEC_RACE_INFO,
+        option: int = OPTION_NORMAL,
+        max_records: Optional[int] = None,
+        record_ids: Optional[Iterable[str]] = None
+    ) -> Iterator[JVRecord]:
+        """
+        蓄積系データを1レコードずつ取得（全件をリストに溜めない）
 
-            logger.info(f"Fetching data: date={start_date}, spec={dataspec}, fromtime={fromtime}")
+        Args:
+            start_date: 開始日 (YYYYMMDD)
+            dataspec: データ種別
+            option: オプション (1=通常, 3=セットアップ)
+            max_records: 最大取得レコード数（Noneの場合は全件）
+            record_ids: 取得するレコードID（Noneの場合は全て）
 
-            # JVOpenでデータ取得開始
-            ret = self.jvlink.JVOpen(dataspec, fromtime, option)
+        Yields:
+            JVRecord: レコード（record_id, raw_data, length）
+        """
+        for record_id, buff in self.iter_records(start_date, dataspec, option, max_records, record_ids):
+            yield JVRecord(record_id, buff, len(buff))
 
-            if isinstance(ret, tuple):
-                returncode = ret[0]
-                readcount = ret[1] if len(ret) > 1 else 0
-            else:
-                returncode = ret
-                readcount = 0
+    def iter_records(
+        self,
+        start_date: str,
+        dataspec: str = DATASPEC_RACE_INFO,
+        option: int = OPTION_NORMAL,
+        max_records: Optional[int] = None,
+        record_ids: Optional[Iterable[str]] = None
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        蓄積系データを1レコードずつ (レコードID, 生データ) のタプルで取得
 
-            if returncode < 0:
-                logger.error(f"JVOpen error: {returncode}")
-                return []
+        レコードごとに辞書を作らないため、全件を走査する処理ではこちらを使う。
+
+        JV-Linkの読み込みは呼び出し側の反復に合わせて進むため、
+        反復はJV-Linkを作成したスレッドで行うこと。
+        読み込み中のエラーは呼び出し側に送出される
+
+        Args:
+            start_date: 開始日 (YYYYMMDD)
+            dataspec: データ種別
+            option: オプション (1=通常, 3=セットアップ)
+            max_records: 最大取得レコード数（Noneの場合は全件）
+            record_ids: 取得するレコードID（Noneの場合は全て）
+
+        Yields:
+            Tuple[str, str]: (レコードID, 生データ)
+        """
+        if not self.is_initialized:
+            logger.error("JV-Link not initialized")
+            return
+
+        # fromtimeをYYYYMMDDhhmmss形式に変換
+        fromtime = start_date + "000000" if len(start_date) == 8 else start_date
+
+        logger.info(f"Fetching data: date={start_date}, spec={dataspec}, fromtime={fromtime}")
+
+        # JVOpenでデータ取得開始
+        ret = self.jvlink.JVOpen(dataspec, fromtime, option)
+
+        if isinstance(ret, tuple):
+            returncode = ret[0]
+            readcount = ret[1] if len(ret) > 1 else 0
+        else:
+            returncode = ret
+            readcount = 0
 
-            logger.info(f"JVOpen success. Expected records: {readcount}")
+        if returncode < 0:
+            logger.error(f"JVOpen error: {returncode}")
+            return
 
+        logger.info(f"JVOpen success. Expected records: {readcount}")
+
+        try:
             # ダウンロード件数がある場合、ダウンロード完了を待つ
             if isinstance(ret, tuple) and len(ret) > 2:
                 downloadcount = ret[2]
                 if downloadcount > 0:
-                    logger.info(f"Waiting for download to complete ({downloadcount} files)...")
-                    while True:
-                        status = self.jvlink.JVStatus()
-                        if status < 0:
-                            logger.error(f"JVStatus error: {status}")
-                            break
-                        if status >= downloadcount:
-                            logger.info("Download completed")
-                            break
-                        time.sleep(2)
+                    self._wait_for_download(downloadcount)
 
             # データを読み込み
+            # 上限はisliceで打ち切り、レコードごとに件数を比較しない
+            buffers = iter_buffers(self.jvlink, self._report_read_error)
+            if max_records:
+                buffers = islice(buffers, max_records)
+
+            # ログレベルは読み込み中に変わらないため、最初に1回だけ判定する
+            log_progress = logger.isEnabledFor(logging.DEBUG)
+            # 対象外のレコードは呼び出し側に渡す前に読み飛ばす
+            wanted = frozenset(record_ids) if record_ids is not None else None
+
             record_count = 0
-            while True:
-                if max_records and record_count >= max_records:
-                    logger.info(f"Reached max records limit: {max_records}")
-                    break
-
-                ret = self.jvlink.JVRead("", 102890, "")
-
-                if isinstance(ret, tuple):
-                    returncode = ret[0]
-                    buff = ret[1] if len(ret) > 1 else ""
-                else:
-                    returncode = ret
-                    buff = ""
-
-                # 読み込み完了
-                if returncode == 0:
-                    break
-
-                # エラー
-                if returncode < 0:
-                    logger.warning(f"JVRead error: {returncode}")
-                    break
-
-                # データを保存
+            for buff in buffers:
+                # データを返す
                 if len(buff) >= 2:
                     record_id = buff[:2]
-                    data_list.append({
-                        'record_id': record_id,
-                        'raw_data': buff,
-                        'length': len(buff)
-                    })
+                    if wanted is None or record_id in wanted:
+                        yield record_id, buff
 
                 record_count += 1
 
-                if record_count % 100 == 0:
+                if log_progress and record_count % 100 == 0:
                     logger.debug(f"Progress: {record_count} records")
 
-            # Close
+            if max_records and record_count >= max_records:
+                logger.info(f"Reached max records limit: {max_records}")
+
+        finally:
+            # 途中で反復をやめた場合も含めて必ずClose
             self.jvlink.JVClose()
 
-            logger.info(f"Data fetch completed. Total records: {len(data_list)}")
-            return data_list
+    @staticmethod
+    def _report_dispatch_fallback(error: Exception):
+        """事前バインディングを使用できない原因をログに出力"""
+        logger.debug(f"Early binding unavailable, using dynamic dispatch: {error}")
 
-        except Exception as e:
-            logger.error(f"Data fetch error: {e}")
-            return []
+    @staticmethod
+    def _report_read_error(returncode: int):
+        """JVReadのエラーをログに出力"""
+        logger.warning(f"JVRead error: {returncode}")
 
-    def get_race_data(self, start_date: str, end_date: Optional[str] = None) -> List[Dict]:
+    def get_race_data(self, start_date: str, end_date: Optional[str] = None) -> List[JVRecord]:
         """
         レース情報を取得
 
@@ -293,11 +399,11 @@ class HistoricalOddsFetcher:
             end_date: 終了日 (YYYYMMDD、Noneの場合はstart_dateのみ)
 
         Returns:
-            List[Dict]: レース情報のリスト
+            List[JVRecord]: レース情報レコードのリスト
         """
         return self.get_data(start_date, self.DATASPEC_RACE_INFO)
 
-    def get_odds_data(self, start_date: str, end_date: Optional[str] = None) -> List[Dict]:
+    def get_odds_data(self, start_date: str, end_date: Optional[str] = None) -> List[JVRecord]:
         """
         オッズデータを取得
 
@@ -306,10 +412,34 @@ class HistoricalOddsFetcher:
             end_date: 終了日 (YYYYMMDD、Noneの場合はstart_dateのみ)
 
         Returns:
-            List[Dict]: オッズデータのリスト
+            List[JVRecord]: オッズデータレコードのリスト
         """
         return self.get_data(start_date, self.DATASPEC_ODDS)
 
+    def iter_race_data(self, start_date: str) -> Iterator[Tuple[str, str]]:
+        """
+        レース情報を1レコードずつ取得
+
+        Args:
+            start_date: 開始日 (YYYYMMDD)
+
+        Yields:
+            Tuple[str, str]: (レコードID, 生データ)
+        """
+        return self.iter_records(start_date, self.DATASPEC_RACE_INFO)
+
+    def iter_odds_data(self, start_date: str) -> Iterator[Tuple[str, str]]:
+        """
+        オッズデータを1レコードずつ取得（オッズ以外のレコードは読み飛ばす）
+
+        Args:
+            start_date: 開始日 (YYYYMMDD)
+
+        Yields:
+            Tuple[str, str]: (レコードID, 生データ)
+        """
+        return self.iter_records(start_date, self.DATASPEC_ODDS, record_ids=self.ODDS_RECORD_IDS)
+
     def close(self):
         """リソースの解放"""
         if self.jvlink:
@@ -352,14 +482,14 @@ if __name__ == "__main__":
 
     # 最近のレース情報を取得してみる
     print("\nFetching recent race data (11/2)...")
-    races = fetcher.get_race_data("20251102", max_records=10)
+    races = fetcher.get_data("20251102", fetcher.DATASPEC_RACE_INFO, max_records=10)
     print(f"Found {len(races)} records")
 
     if races:
         print("\nFirst race:")
-        print(f"  Record ID: {races[0]['record_id']}")
-        print(f"  Data length: {races[0]['length']}")
-        print(f"  Preview: {races[0]['raw_data'][:100]}...")
+        print(f"  Record ID: {races[0].record_id}")
+        print(f"  Data length: {races[0].length}")
+        print(f"  Preview: {races[0].raw_data[:100]}...")
 
     fetcher.close()
     print("\nTest completed")
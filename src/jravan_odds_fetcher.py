@@ -10,17 +10,40 @@ JRA-VAN リアルタイムオッズ取得スクリプト
 - JV-Linkがインストールされている必要があります
 """
 
-import win32com.client
 import sys
 from datetime import datetime
 from typing import Optional, Dict, List
 
+from .jvlink import dispatch, iter_buffers
 from .odds_parser import parse_odds_record
 
+# RAレコードのレースID位置（0始まり、文字単位。仕様上の位置12-27）
+_RACE_ID_SLICE = slice(11, 27)
+
 
 class JRAVANOddsFetcher:
     """JRA-VANからオッズデータを取得するクラス"""
 
+    # レコードIDごとの賭式名
+    _RECORD_TYPES = {
+        'O1': '単勝・複勝',
+        'O2': '枠連',
+        'O3': '馬連',
+        'O4': 'ワイド',
+        'O5': '馬単',
+        'O6': '三連複・三連単'
+    }
+
+    # レコードIDごとのレコード名称
+    _RECORD_TYPE_NAMES = {
+        'O1': '単勝・複勝オッズ',
+        'O2': '枠連オッズ',
+        'O3': '馬連オッズ',
+        'O4': 'ワイドオッズ',
+        'O5': '馬単オッズ',
+        'O6': '三連複・三連単オッズ'
+    }
+
     def __init__(self, service_key: str = "UNKNOWN"):
         """
         初期化
@@ -45,7 +68,7 @@ class JRAVANOddsFetcher:
         """
         try:
             # JV-LinkのCOMオブジェクトを作成
-            self.jvlink = win32com.client.Dispatch('JVDTLab.JVLink')
+            self.jvlink = dispatch(self._report_dispatch_fallback)
 
             # 初期化
             ret = self.jvlink.JVInit(self.service_key)
@@ -101,38 +124,23 @@ class JRAVANOddsFetcher:
 
             print(f"データ取得開始: レースID={race_id}")
 
+            # 同じ読み込みで取得したレコードには同じ取得時刻を付ける
+            timestamp = datetime.now().isoformat()
+            record_types = self._RECORD_TYPES
+
             # データを読み込み
-            while True:
-                ret = self.jvlink.JVRead("", 102890, "")
-
-                if isinstance(ret, tuple):
-                    returncode = ret[0]
-                    buff = ret[1] if len(ret) > 1 else ""
-                else:
-                    returncode = ret
-                    buff = ""
-
-                # 読み込み完了
-                if returncode == 0:
-                    break
-
-                # データが存在しない
-                if returncode < 0:
-                    print(f"JVRead エラー: {returncode}")
-                    break
-
-                # レコードIDを取得
-                if len(buff) < 2:
-                    continue
+            for buff in iter_buffers(self.jvlink, self._report_read_error):
+                # レコードIDを取得（2文字未満のバッファはどのレコードIDにも一致しない）
+                rec_id = buff[:2]
 
-                rec_id = buff[0:2]
+                # オッズデータ (O1-O6) 以外は読み飛ばす
+                if rec_id not in record_types:
+                    continue
 
-                # オッズデータ (O1-O6) の処理
-                if rec_id in ['O1', 'O2', 'O3', 'O4', 'O5', 'O6']:
-                    odds_info = self._parse_odds_record(rec_id, buff)
-                    if odds_info:
-                        odds_data.append(odds_info)
-                        print(f"  取得: {rec_id} - {odds_info.get('type', 'Unknown')}")
+                odds_info = self._parse_odds_record(rec_id, buff, timestamp)
+                if odds_info:
+                    odds_data.append(odds_info)
+                    print(f"  取得: {rec_id} - {odds_info.get('type', 'Unknown')}")
 
             # クローズ
             self.jvlink.JVClose()
@@ -143,24 +151,33 @@ class JRAVANOddsFetcher:
 
         return odds_data
 
-    def _parse_odds_record(self, rec_id: str, buff: str) -> Optional[Dict]:
+    def _parse_odds_record(
+        self,
+        rec_id: str,
+        buff: str,
+        timestamp: Optional[str] = None
+    ) -> Optional[Dict]:
         """
         オッズレコードをパース
 
         Args:
             rec_id: レコードID
             buff: データバッファ
+            timestamp: 取得時刻（ISO形式、省略時は現在時刻）
 
         Returns:
             Optional[Dict]: パースされたオッズ情報
         """
         try:
-            # odds_parser.pyのparse_odds_record関数を使用
-            parsed_data = parse_odds_record(rec_id, buff)
+            if timestamp is None:
+                timestamp = datetime.now().isoformat()
+
+            # odds_parser.pyのparse_odds_record関数を使用（パース時刻は取得時刻と共通）
+            parsed_data = parse_odds_record(rec_id, buff, timestamp)
 
             if parsed_data:
                 # タイムスタンプを追加
-                parsed_data['timestamp'] = datetime.now().isoformat()
+                parsed_data['timestamp'] = timestamp
                 return parsed_data
 
             # パースに失敗した場合は基本情報のみ返す
@@ -168,22 +185,13 @@ class JRAVANOddsFetcher:
                 'record_id': rec_id,
                 'record_type': self._get_record_type_name(rec_id),
                 'raw_data': buff[:100],
-                'timestamp': datetime.now().isoformat()
+                'timestamp': timestamp
             }
 
             # タイプ名を設定
-            if rec_id == 'O1':
-                odds_info['type'] = '単勝・複勝'
-            elif rec_id == 'O2':
-                odds_info['type'] = '枠連'
-            elif rec_id == 'O3':
-                odds_info['type'] = '馬連'
-            elif rec_id == 'O4':
-                odds_info['type'] = 'ワイド'
-            elif rec_id == 'O5':
-                odds_info['type'] = '馬単'
-            elif rec_id == 'O6':
-                odds_info['type'] = '三連複・三連単'
+            type_name = self._RECORD_TYPES.get(rec_id)
+            if type_name:
+                odds_info['type'] = type_name
 
             return odds_info
 
@@ -193,15 +201,7 @@ class JRAVANOddsFetcher:
 
     def _get_record_type_name(self, rec_id: str) -> str:
         """レコードIDから名称を取得"""
-        record_types = {
-            'O1': '単勝・複勝オッズ',
-            'O2': '枠連オッズ',
-            'O3': '馬連オッズ',
-            'O4': 'ワイドオッズ',
-            'O5': '馬単オッズ',
-            'O6': '三連複・三連単オッズ'
-        }
-        return record_types.get(rec_id, '未知')
+        return self._RECORD_TYPE_NAMES.get(rec_id, '未知')
 
     def get_race_info(self, date: str) -> List[Dict]:
         """
@@ -236,29 +236,14 @@ class JRAVANOddsFetcher:
             print(f"レース情報取得開始: {date}")
 
             # データを読み込み
-            while True:
-                ret = self.jvlink.JVRead("", 102890, "")
-
-                if isinstance(ret, tuple):
-                    returncode = ret[0]
-                    buff = ret[1] if len(ret) > 1 else ""
-                else:
-                    returncode = ret
-                    buff = ""
-
-                if returncode == 0:
-                    break
-
-                if returncode < 0:
-                    break
-
+            for buff in iter_buffers(self.jvlink, self._report_read_error):
                 if len(buff) >= 2:
                     rec_id = buff[0:2]
                     if rec_id == 'RA':  # レース詳細
                         # RAレコードからrace_idを抽出
                         # レースキー位置: 12-27 (16バイト)
                         if len(buff) >= 28:
-                            race_id = buff[11:27].strip()  # 位置12-27（0-indexed: 11-27）
+                            race_id = buff[_RACE_ID_SLICE].strip()
                         else:
                             race_id = ''
 
@@ -277,6 +262,16 @@ class JRAVANOddsFetcher:
 
         return race_info_list
 
+    @staticmethod
+    def _report_dispatch_fallback(error: Exception):
+        """事前バインディングを使用できない原因を出力"""
+        print(f"事前バインディングを使用できないため動的ディスパッチを使用します: {error}")
+
+    @staticmethod
+    def _report_read_error(returncode: int):
+        """JVReadのエラーを出力"""
+        print(f"JVRead エラー: {returncode}")
+
     def close(self):
         """リソースの解放"""
         if self.jvlink:
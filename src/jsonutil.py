@@ -0,0 +1,79 @@
+"""
+JSONエンコード・デコードの共通処理
+
+orjsonがあれば使用し、なければ標準のjsonで同じ形式（UTF-8、非ASCII文字はそのまま）を出力します。
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Union
+
+# orjsonがあれば使用（任意）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps(data: Any, indent: bool = False) -> bytes:
+    """
+    JSONをUTF-8バイト列にエンコード
+
+    Args:
+        data: エンコードするデータ
+        indent: インデント付き（2スペース）で出力するか
+
+    Returns:
+        bytes: JSONバイト列
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    if indent:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    JSONバイト列（または文字列）をデコード
+
+    Args:
+        data: JSONバイト列
+
+    Returns:
+        デコードされたデータ
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_file(path: Path) -> Any:
+    """
+    JSONファイルを読み込み
+
+    Args:
+        path: ファイルパス
+
+    Returns:
+        読み込んだデータ
+    """
+    return loads(Path(path).read_bytes())
+
+
+def dump_file(path: Path, data: Any, indent: bool = True):
+    """
+    JSONファイルに書き込み
+
+    Args:
+        path: ファイルパス
+        data: 書き込むデータ
+        indent: インデント付きで出力するか
+    """
+    # json.dumpのように少しずつ書き込まず、バイト列にしてから1回で書き込む
+    # （エンコードはファイルを開く前に終わるため、失敗しても途中までのファイルが残らない）
+    Path(path).write_bytes(dumps(data, indent=indent))
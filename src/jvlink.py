@@ -0,0 +1,66 @@
+"""
+JV-Link共通処理
+
+リアルタイム（JRAVANOddsFetcher）と蓄積系（HistoricalOddsFetcher）で共有する
+JV-Link呼び出しをまとめます。
+"""
+
+from typing import Callable, Iterator
+
+import win32com.client
+
+
+def dispatch(on_fallback: Callable[[Exception], None]):
+    """
+    JV-LinkのCOMオブジェクトを作成
+
+    タイプライブラリから生成したラッパー（事前バインディング）を使い、
+    呼び出しごとのIDispatch名前解決を避ける。生成できない環境では動的ディスパッチ
+
+    Args:
+        on_fallback: 動的ディスパッチに切り替えた場合に原因の例外を渡して呼び出す関数
+
+    Returns:
+        JV-LinkのCOMオブジェクト
+    """
+    try:
+        return win32com.client.gencache.EnsureDispatch('JVDTLab.JVLink')
+    except Exception as e:
+        # 生成済みラッパー（gen_py）のキャッシュが古い・壊れている場合もここに来る
+        on_fallback(e)
+        return win32com.client.Dispatch('JVDTLab.JVLink')
+
+
+def iter_buffers(jvlink, on_error: Callable[[int], None]) -> Iterator[str]:
+    """
+    JVReadで読み込んだバッファを順に取得（読み込み完了またはエラーで終了）
+
+    戻り値の形（出力引数を含むタプルかどうか）はバインディングごとに固定のため、
+    最初の1回だけ判定してレコードごとの分岐を省く
+
+    Args:
+        jvlink: JV-LinkのCOMオブジェクト（JVOpen/JVRTOpen済み）
+        on_error: JVReadがエラーを返した場合に戻り値を渡して呼び出す関数
+
+    Yields:
+        str: 読み込んだバッファ
+    """
+    # ループ内で属性解決を繰り返さないよう、メソッドをローカル変数に取り出す
+    jvread = jvlink.JVRead
+    ret = jvread("", 102890, "")
+
+    if isinstance(ret, tuple):
+        # (戻り値, バッファ, サイズ, ファイル名)
+        while ret[0] > 0:
+            yield ret[1]
+            ret = jvread("", 102890, "")
+        returncode = ret[0]
+    else:
+        # 出力引数が返らないバインディングではバッファを取得できない
+        while ret > 0:
+            yield ""
+            ret = jvread("", 102890, "")
+        returncode = ret
+
+    if returncode < 0:
+        on_error(returncode)
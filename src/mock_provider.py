@@ -4,12 +4,46 @@
 開発環境で使用するモックデータを提供
 """
 
-import json
+import logging
 import random
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from . import jsonutil
+
+logger = logging.getLogger(__name__)
+
+
+def _vary_odds(items: List[Dict], keys: Tuple[str, ...], low: float, high: float) -> List[Dict]:
+    """
+    オッズのリストにランダムな変動を加えた新しいリストを作成
+
+    元のエントリは変更しない。1エントリにつき乱数は1回だけ生成し、
+    同じ倍率をそのエントリの各キーに掛ける
+
+    Args:
+        items: オッズのエントリのリスト
+        keys: 変動を加えるキー（存在するものだけ更新）
+        low: 変動倍率の下限
+        high: 変動倍率の上限
+
+    Returns:
+        List[Dict]: 変動を加えたエントリのリスト
+    """
+    rand = random.random
+    span = high - low
+    varied_items = []
+    for item in items:
+        variation = low + span * rand()
+        varied = dict(item)
+        for key in keys:
+            if key in varied:
+                varied[key] = round(varied[key] * variation, 1)
+        varied_items.append(varied)
+    return varied_items
+
 
 class MockDataProvider:
     """モックデータプロバイダークラス"""
@@ -24,18 +58,20 @@ class MockDataProvider:
         self.mock_data_file = mock_data_file
         self.mock_data = self._load_mock_data()
 
+        # 日付ごとのレース情報リスト（get_race_infoで作成、add_mock_raceで破棄）
+        self._race_info_by_date: Dict[str, List[Dict]] = {}
+
     def _load_mock_data(self) -> Dict:
         """モックデータを読み込み"""
         try:
             filepath = Path(self.mock_data_file)
             if filepath.exists():
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return jsonutil.load_file(filepath)
             else:
-                print(f"モックデータファイルが見つかりません: {self.mock_data_file}")
+                logger.warning(f"モックデータファイルが見つかりません: {self.mock_data_file}")
                 return self._generate_default_mock_data()
         except Exception as e:
-            print(f"モックデータ読み込みエラー: {e}")
+            logger.error(f"モックデータ読み込みエラー: {e}")
             return self._generate_default_mock_data()
 
     def _generate_default_mock_data(self) -> Dict:
@@ -55,11 +91,16 @@ class MockDataProvider:
         Returns:
             List[Dict]: レース情報のリスト
         """
+        race_info_list = self._race_info_by_date.get(date)
+        if race_info_list is not None:
+            return list(race_info_list)
+
         race_ids = self.mock_data.get("race_schedules", {}).get(date, [])
+        races = self.mock_data.get("races", {})
 
         race_info_list = []
         for race_id in race_ids:
-            race = self.mock_data.get("races", {}).get(race_id)
+            race = races.get(race_id)
             if race:
                 race_info_list.append({
                     'race_id': race_id,
@@ -71,7 +112,10 @@ class MockDataProvider:
                     'track_type': race.get('track_type', '')
                 })
 
-        return race_info_list
+        # 存在しない日付は保持しない（任意の日付の問い合わせでキャッシュが増えないように）
+        if race_info_list:
+            self._race_info_by_date[date] = race_info_list
+        return list(race_info_list)
 
     def get_realtime_odds(self, race_id: str) -> List[Dict]:
         """
@@ -89,60 +133,61 @@ class MockDataProvider:
             return []
 
         odds_dict = race.get("odds", {})
+
+        # 時刻は1回の取得で共通（レコードごとに取得・整形しない）
+        now = datetime.now()
         odds_list = []
 
         for record_id, odds_data in odds_dict.items():
             # オッズをランダムに変動させる（リアルタイム感を出すため）
-            varied_odds = self._add_odds_variation(odds_data.copy())
+            varied_odds = self._add_odds_variation(odds_data, now)
             varied_odds['mock'] = True
-            varied_odds['timestamp'] = datetime.now().isoformat()
+            varied_odds['timestamp'] = varied_odds['parsed_at']
             odds_list.append(varied_odds)
 
         return odds_list
 
-    def _add_odds_variation(self, odds_data: Dict) -> Dict:
+    def _add_odds_variation(self, odds_data: Dict, now: Optional[datetime] = None) -> Dict:
         """
-        オッズにランダムな変動を加える
+        オッズにランダムな変動を加えたコピーを作成
+
+        読み込んだモックデータは変更しない（変動が呼び出しごとに累積しないように、
+        変動を加えるエントリのリストだけを作り直す）
 
         Args:
             odds_data: オッズデータ
+            now: 現在時刻（Noneの場合は取得する）
 
         Returns:
             Dict: 変動を加えたオッズデータ
         """
+        varied_odds = dict(odds_data)
         record_id = odds_data.get('record_id', '')
 
         # 単勝・複勝
         if record_id == 'O1':
             if 'tansho' in odds_data:
-                for item in odds_data['tansho']:
-                    variation = random.uniform(0.95, 1.05)
-                    item['odds'] = round(item['odds'] * variation, 1)
+                varied_odds['tansho'] = _vary_odds(odds_data['tansho'], ('odds',), 0.95, 1.05)
 
             if 'fukusho' in odds_data:
-                for item in odds_data['fukusho']:
-                    variation = random.uniform(0.95, 1.05)
-                    item['odds_min'] = round(item['odds_min'] * variation, 1)
-                    item['odds_max'] = round(item['odds_max'] * variation, 1)
+                varied_odds['fukusho'] = _vary_odds(
+                    odds_data['fukusho'], ('odds_min', 'odds_max'), 0.95, 1.05
+                )
 
         # その他のオッズタイプ
         elif 'combinations' in odds_data:
-            for item in odds_data['combinations']:
-                variation = random.uniform(0.9, 1.1)
-                if 'odds' in item:
-                    item['odds'] = round(item['odds'] * variation, 1)
-                if 'odds_min' in item:
-                    item['odds_min'] = round(item['odds_min'] * variation, 1)
-                if 'odds_max' in item:
-                    item['odds_max'] = round(item['odds_max'] * variation, 1)
+            varied_odds['combinations'] = _vary_odds(
+                odds_data['combinations'], ('odds', 'odds_min', 'odds_max'), 0.9, 1.1
+            )
 
         # 時刻を現在時刻に更新
-        now = datetime.now()
-        odds_data['odds_time'] = now.strftime("%H%M%S")
-        odds_data['odds_time_formatted'] = now.strftime("%H:%M:%S")
-        odds_data['parsed_at'] = now.isoformat()
+        if now is None:
+            now = datetime.now()
+        varied_odds['odds_time'] = now.strftime("%H%M%S")
+        varied_odds['odds_time_formatted'] = now.strftime("%H:%M:%S")
+        varied_odds['parsed_at'] = now.isoformat()
 
-        return odds_data
+        return varied_odds
 
     def get_race_detail(self, race_id: str) -> Optional[Dict]:
         """
@@ -202,6 +247,7 @@ class MockDataProvider:
 
         # スケジュールも更新
         date = race_id[:8]
+        self._race_info_by_date.pop(date, None)
         if "race_schedules" not in self.mock_data:
             self.mock_data["race_schedules"] = {}
 
@@ -217,21 +263,18 @@ class MockDataProvider:
             filepath = Path(self.mock_data_file)
             filepath.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(self.mock_data, f, ensure_ascii=False, indent=2)
+            jsonutil.dump_file(filepath, self.mock_data)
 
-            print(f"モックデータを保存しました: {self.mock_data_file}")
+            logger.info(f"モックデータを保存しました: {self.mock_data_file}")
         except Exception as e:
-            print(f"モックデータ保存エラー: {e}")
-
-
-# グローバルインスタンス
-_mock_provider = None
+            logger.error(f"モックデータ保存エラー: {e}")
 
 
+# グローバルインスタンス（モックデータファイルごとにキャッシュ）
+@lru_cache(maxsize=None)
 def get_mock_provider(mock_data_file: str = "./mock_data/sample_odds.json") -> MockDataProvider:
     """
-    モックプロバイダーのシングルトンインスタンスを取得
+    モックプロバイダーのシングルトンインスタンスを取得（モックデータファイルごとに1つ）
 
     Args:
         mock_data_file: モックデータファイルのパス
@@ -239,10 +282,7 @@ def get_mock_provider(mock_data_file: str = "./mock_data/sample_odds.json") -> M
     Returns:
         MockDataProvider: モックプロバイダー
     """
-    global _mock_provider
-    if _mock_provider is None:
-        _mock_provider = MockDataProvider(mock_data_file)
-    return _mock_provider
+    return MockDataProvider(mock_data_file)
 
 
 if __name__ == "__main__":
@@ -4,14 +4,68 @@
 過去のオッズデータをJSONファイルとしてキャッシュします。
 """
 
-import json
 import logging
-from typing import Dict, List, Optional
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime
 from pathlib import Path
 
+from . import jsonutil
+
 logger = logging.getLogger(__name__)
 
+# save_manyでファイルを並行して書き込むスレッド数
+_SAVE_WORKERS = 4
+
+# インデックスファイルへの書き込みをまとめる件数・間隔（秒）
+FLUSH_EVERY = 32
+FLUSH_INTERVAL = 30.0
+
+
+def _dump_json_atomic(path: Path, data):
+    """
+    JSONファイルを一時ファイル経由で置き換え（読み込み側が書き込み途中のファイルを見ないようにする）
+
+    Args:
+        path: ファイルパス
+        data: 書き込むデータ
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        jsonutil.dump_file(tmp_path, data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _index_entry(data: Dict, path: Path) -> Dict:
+    """
+    キャッシュファイルの内容からインデックスのエントリを作成
+
+    Args:
+        data: キャッシュファイルのデータ
+        path: キャッシュファイルのパス
+
+    Returns:
+        Dict: インデックスのエントリ
+    """
+    if data.get('data_type') == 'time_series':
+        return {
+            'cached_at': data.get('cached_at'),
+            'file_path': str(path),
+            'data_type': 'time_series',
+            'timeline_count': len(data.get('odds_timeline') or [])
+        }
+    return {
+        'cached_at': data.get('cached_at'),
+        'file_path': str(path),
+        'odds_count': len(data.get('odds') or [])
+    }
+
 
 class OddsCache:
     """オッズデータのキャッシュ管理クラス"""
@@ -28,91 +82,474 @@ class OddsCache:
 
         # インデックスファイルのパス
         self.index_file = self.cache_dir / "cache_index.json"
-        self.index = self._load_index()
-
-    def _load_index(self) -> Dict:
+        # 未保存の更新がある日付の記録（異常終了後の復旧用）
+        self.pending_file = self.cache_dir / "cache_index.pending.json"
+        index = self._load_index()
+        self.index = index if index is not None else {}
+
+        # 日付ごとのレースID（get_cached_racesでインデックス全体を走査しない）
+        self._races_by_date: Dict[str, Dict[str, None]] = {}
+        for race_id in self.index:
+            self._races_by_date.setdefault(race_id[:8], {})[race_id] = None
+
+        # 作成済みの日付ディレクトリ（書き込みのたびにmkdirしない）
+        self._ensured_dirs = set()
+
+        # インデックスの未保存の更新（FLUSH_EVERY件またはFLUSH_INTERVAL秒ごとにまとめて保存）
+        # 全体のインデックスと日付ごとのレース情報インデックスは同時に書き込む
+        self._dirty_dates: Set[str] = set()
+        self._pending_race_infos: Dict[str, Dict[str, Optional[Dict]]] = {}
+        self._pending_writes = 0
+        self._last_flush = time.monotonic()
+
+        # 前回保存されなかった更新があれば、該当する日付のインデックスを作り直す
+        # （インデックスが壊れていた場合はすべての日付）
+        self._recover_pending(rebuild_all=index is None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _load_index(self) -> Optional[Dict]:
         """
         キャッシュインデックスを読み込み
 
         Returns:
-            Dict: インデックスデータ
+            Optional[Dict]: インデックスデータ（ファイルがない場合は空、読み込めない場合はNone）
+        """
+        try:
+            return jsonutil.load_file(self.index_file)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Failed to load cache index: {e}")
+            return None
+
+    def _save_index(self) -> bool:
+        """
+        キャッシュインデックスを保存
+
+        Returns:
+            bool: 成功すればTrue
+        """
+        try:
+            _dump_json_atomic(self.index_file, self.index)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save cache index: {e}")
+            return False
+
+    def _recover_pending(self, rebuild_all: bool = False):
+        """
+        前回異常終了して保存されなかったインデックスの更新を復旧
+
+        未保存の更新が記録された日付について、各キャッシュファイルから
+        インデックスと日付ごとのレース情報インデックスを作り直す
+
+        Args:
+            rebuild_all: Trueの場合はすべての日付を作り直す
+        """
+        dates = None
+        if not rebuild_all:
+            try:
+                dates = jsonutil.load_file(self.pending_file)
+            except FileNotFoundError:
+                return
+            except Exception as e:
+                logger.warning(f"Failed to load pending cache index updates, rebuilding all dates: {e}")
+        if dates is None:
+            dates = [path.name for path in self.cache_dir.iterdir()
+                     if path.is_dir() and len(path.name) == 8 and path.name.isdigit()]
+
+        for date in dates:
+            self._rebuild_date(date)
+
+        if self._save_index():
+            self._remove_pending_file()
+        logger.info(f"Recovered cache index for {len(dates)} dates")
+
+    def _rebuild_date(self, date: str):
+        """
+        指定日のインデックスとレース情報インデックスを各キャッシュファイルから作り直す
+
+        Args:
+            date: 日付 (YYYYMMDD)
         """
-        if self.index_file.exists():
+        for race_id in list(self._races_by_date.get(date, ())):
+            self._index_remove(race_id)
+
+        date_dir = self.cache_dir / date
+        if not date_dir.is_dir():
+            return
+
+        race_infos = {}
+        # レースIDは日付で始まるため、_index.jsonや一時ファイルは対象外になる
+        for path in sorted(date_dir.glob(f"{date}*.json")):
             try:
-                with open(self.index_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                data = jsonutil.load_file(path)
             except Exception as e:
-                logger.error(f"Failed to load cache index: {e}")
-                return {}
-        return {}
+                logger.warning(f"Skipping unreadable cache file {path}: {e}")
+                continue
+            race_id = data.get('race_id') or path.stem
+            self._index_put(race_id, _index_entry(data, path))
+            race_infos[race_id] = data.get('race_info') or {}
+
+        self._update_race_infos(date, race_infos, replace=True)
 
-    def _save_index(self):
-        """キャッシュインデックスを保存"""
+    def _remove_pending_file(self):
+        """未保存の更新の記録を削除（すべて書き込めた後に呼び出す）"""
         try:
-            with open(self.index_file, 'w', encoding='utf-8') as f:
-                json.dump(self.index, f, ensure_ascii=False, indent=2)
+            self.pending_file.unlink(missing_ok=True)
+        except OSError as e:
+            logger.error(f"Failed to remove pending cache index record: {e}")
+
+    def _begin_update(self, date: str):
+        """
+        キャッシュファイルを書き換える前に、未保存の更新がある日付として記録
+
+        異常終了した場合は、次回の初期化時にこの日付のインデックスを作り直す
+
+        Args:
+            date: 日付 (YYYYMMDD)
+        """
+        if date in self._dirty_dates:
+            return
+        self._dirty_dates.add(date)
+        try:
+            _dump_json_atomic(self.pending_file, sorted(self._dirty_dates))
         except Exception as e:
-            logger.error(f"Failed to save cache index: {e}")
+            logger.error(f"Failed to record pending cache index update: {e}")
+
+    def _index_put(self, race_id: str, entry: Dict):
+        """
+        インデックス（メモリ上）にエントリを追加・更新
+
+        Args:
+            race_id: レースID
+            entry: インデックスのエントリ
+        """
+        self.index[race_id] = entry
+        self._races_by_date.setdefault(race_id[:8], {})[race_id] = None
+
+    def _index_remove(self, race_id: str) -> bool:
+        """
+        インデックス（メモリ上）からエントリを削除
+
+        Args:
+            race_id: レースID
+
+        Returns:
+            bool: エントリが存在して削除した場合はTrue
+        """
+        if self.index.pop(race_id, None) is None:
+            return False
+        date = race_id[:8]
+        races = self._races_by_date.get(date)
+        if races is not None:
+            races.pop(race_id, None)
+            if not races:
+                del self._races_by_date[date]
+        return True
+
+    def _mark_index_dirty(self):
+        """
+        インデックスの更新を記録し、一定件数・一定時間ごとにまとめて保存
 
-    def _get_cache_path(self, race_id: str) -> Path:
+        保存していない更新はflush()またはclose()で書き込まれる
+        """
+        self._pending_writes += 1
+        if (self._pending_writes >= FLUSH_EVERY
+                or time.monotonic() - self._last_flush >= FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        """未保存のインデックス・レース情報インデックスの更新を書き込み"""
+        if not self._dirty_dates:
+            return
+
+        pending, self._pending_race_infos = self._pending_race_infos, {}
+        saved = True
+        for date, race_infos in pending.items():
+            if not self._update_race_infos(date, race_infos):
+                # 書き込めなかった更新は次回のflushで再度書き込む
+                self._queue_race_infos(date, race_infos)
+                saved = False
+        saved &= self._save_index()
+
+        # すべて書き込めた場合のみ復旧用の記録を消す（失敗時は次回の初期化で作り直す）
+        if saved:
+            self._dirty_dates.clear()
+            self._remove_pending_file()
+        self._pending_writes = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """未保存のインデックスの更新を書き込んで終了"""
+        self.flush()
+
+    def _ensure_date_dir(self, date: str) -> Path:
+        """
+        日付ディレクトリを作成（このインスタンスで作成済みならmkdirを省略）
+
+        Args:
+            date: 日付 (YYYYMMDD)
+
+        Returns:
+            Path: 日付ディレクトリのパス
+        """
+        date_dir = self.cache_dir / date
+        if date not in self._ensured_dirs:
+            date_dir.mkdir(parents=True, exist_ok=True)
+            self._ensured_dirs.add(date)
+        return date_dir
+
+    def _get_cache_path(self, race_id: str, create: bool = False) -> Path:
         """
         レースIDからキャッシュファイルのパスを取得
 
         Args:
             race_id: レースID (YYYYMMDDJJKKRR)
+            create: 日付ディレクトリを作成するか（書き込み時のみTrue）
 
         Returns:
             Path: キャッシュファイルのパス
         """
         # 日付でディレクトリを分ける
         date = race_id[:8]
-        date_dir = self.cache_dir / date
-        date_dir.mkdir(parents=True, exist_ok=True)
+        date_dir = self._ensure_date_dir(date) if create else self.cache_dir / date
 
         return date_dir / f"{race_id}.json"
 
-    def save_odds(
+    def _get_race_index_path(self, date: str) -> Path:
+        """
+        日付ごとのレース情報インデックスのパスを取得
+
+        Args:
+            date: 日付 (YYYYMMDD)
+
+        Returns:
+            Path: インデックスファイルのパス
+        """
+        return self.cache_dir / date / "_index.json"
+
+    def _update_race_infos(
+        self,
+        date: str,
+        race_infos: Dict[str, Optional[Dict]],
+        replace: bool = False
+    ) -> bool:
+        """
+        日付ごとのレース情報インデックスを更新
+
+        Args:
+            date: 日付 (YYYYMMDD)
+            race_infos: {レースID: レース情報}（Noneの場合はインデックスから削除）
+            replace: Trueの場合は既存のインデックスを読まずにrace_infosで置き換える
+
+        Returns:
+            bool: 成功すればTrue（壊れたインデックスを破棄した場合も含む）
+        """
+        index_path = self._get_race_index_path(date)
+        try:
+            infos = {}
+            if not replace:
+                try:
+                    infos = jsonutil.load_file(index_path)
+                except FileNotFoundError:
+                    pass
+                except ValueError as e:
+                    # 壊れたインデックスは削除し、次回のload_race_infosで各ファイルから作り直す
+                    logger.warning(f"Discarding corrupt race info index for {date}: {e}")
+                    index_path.unlink(missing_ok=True)
+                    return True
+
+            for race_id, race_info in race_infos.items():
+                if race_info is None:
+                    infos.pop(race_id, None)
+                else:
+                    infos[race_id] = race_info
+
+            self._ensure_date_dir(date)
+            _dump_json_atomic(index_path, infos)
+            return True
+
+        except Exception as e:
+            # ディレクトリが削除された場合に備えて作成済みの記録を破棄
+            self._ensured_dirs.discard(date)
+            logger.error(f"Failed to update race info index for {date}: {e}")
+            return False
+
+    def _queue_race_infos(self, date: str, race_infos: Dict[str, Optional[Dict]]):
+        """
+        日付ごとのレース情報インデックスの更新を保留（flush時にまとめて書き込む）
+
+        Args:
+            date: 日付 (YYYYMMDD)
+            race_infos: {レースID: レース情報}（Noneの場合はインデックスから削除）
+        """
+        self._pending_race_infos.setdefault(date, {}).update(race_infos)
+
+    def _write_odds(
         self,
         race_id: str,
         odds_data: List[Dict],
         race_info: Optional[Dict] = None,
         metadata: Optional[Dict] = None
-    ):
+    ) -> bool:
         """
-        オッズデータをキャッシュに保存
+        オッズデータをファイルに書き込み、インデックス（メモリ上）を更新
+
+        インデックスファイルへの保存は呼び出し側で行う
 
         Args:
             race_id: レースID
             odds_data: オッズデータのリスト
             race_info: レース情報（オプション）
             metadata: メタデータ（オプション）
+
+        Returns:
+            bool: 成功すればTrue
+        """
+        date = race_id[:8]
+        try:
+            self._ensure_date_dir(date)
+        except OSError as e:
+            logger.error(f"Failed to create cache directory: {e}")
+            return False
+
+        entry = self._write_odds_file(race_id, odds_data, race_info, metadata)
+        if entry is None:
+            # ディレクトリが削除された場合に備えて作成済みの記録を破棄
+            self._ensured_dirs.discard(date)
+            return False
+
+        # インデックスを更新
+        self._index_put(race_id, entry)
+        return True
+
+    def _write_odds_file(
+        self,
+        race_id: str,
+        odds_data: List[Dict],
+        race_info: Optional[Dict] = None,
+        metadata: Optional[Dict] = None,
+        cached_at: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        オッズデータをファイルに書き込み（インデックスは更新しない）
+
+        日付ディレクトリは呼び出し側で作成しておくこと。インデックスや作成済みディレクトリの
+        記録などのインスタンスの状態は読み書きしないため、save_manyのスレッドから並行して呼び出せる
+
+        Args:
+            race_id: レースID
+            odds_data: オッズデータのリスト
+            race_info: レース情報（オプション）
+            metadata: メタデータ（オプション）
+            cached_at: 保存時刻（ISO形式、Noneの場合は現在時刻）
+
+        Returns:
+            Optional[Dict]: インデックスのエントリ、失敗した場合はNone
         """
         try:
             cache_path = self._get_cache_path(race_id)
 
             data = {
                 'race_id': race_id,
-                'cached_at': datetime.now().isoformat(),
+                'cached_at': cached_at or datetime.now().isoformat(),
                 'race_info': race_info or {},
                 'metadata': metadata or {},
                 'odds': odds_data
             }
 
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-
-            # インデックスを更新
-            self.index[race_id] = {
-                'cached_at': data['cached_at'],
-                'file_path': str(cache_path),
-                'odds_count': len(odds_data)
-            }
-            self._save_index()
+            # レースごとのオッズファイルは件数が多いため、インデントなしで書き込む
+            jsonutil.dump_file(cache_path, data, indent=False)
 
-            logger.info(f"Odds cached: {race_id} ({len(odds_data)} records)")
+            return _index_entry(data, cache_path)
 
         except Exception as e:
             logger.error(f"Failed to save odds cache: {e}")
+            return None
+
+    def save_odds(
+        self,
+        race_id: str,
+        odds_data: List[Dict],
+        race_info: Optional[Dict] = None,
+        metadata: Optional[Dict] = None
+    ):
+        """
+        オッズデータをキャッシュに保存
+
+        Args:
+            race_id: レースID
+            odds_data: オッズデータのリスト
+            race_info: レース情報（オプション）
+            metadata: メタデータ（オプション）
+        """
+        date = race_id[:8]
+        self._begin_update(date)
+        if self._write_odds(race_id, odds_data, race_info, metadata):
+            self._queue_race_infos(date, {race_id: race_info or {}})
+            self._mark_index_dirty()
+            logger.info(f"Odds cached: {race_id} ({len(odds_data)} records)")
+
+    def save_many(self, items: Iterable[Tuple[str, List[Dict], Optional[Dict]]]) -> int:
+        """
+        複数レースのオッズデータをまとめてキャッシュに保存
+
+        レースごとのファイル書き込みはスレッドで並行して行い、
+        インデックスの更新は元の順番で、インデックスファイルへの書き込みは最後に1回だけ行う
+
+        Args:
+            items: (レースID, オッズデータのリスト, レース情報) のイテラブル
+
+        Returns:
+            int: 保存に成功したレース数
+        """
+        items = list(items)
+        write_file = self._write_odds_file
+
+        for date in {item[0][:8] for item in items}:
+            self._begin_update(date)
+            # 日付ディレクトリはこのスレッドで作成し、書き込みスレッドには共有の状態を触らせない
+            try:
+                self._ensure_date_dir(date)
+            except OSError as e:
+                logger.error(f"Failed to create cache directory: {e}")
+
+        # 同じバッチのレースは同じ保存時刻にする（時刻の取得・整形は1回）
+        cached_at = datetime.now().isoformat()
+
+        if len(items) > 1:
+            with ThreadPoolExecutor(max_workers=min(_SAVE_WORKERS, len(items))) as executor:
+                entries = list(executor.map(
+                    lambda item: write_file(item[0], item[1], item[2], None, cached_at),
+                    items
+                ))
+        else:
+            entries = [write_file(race_id, odds_data, race_info, None, cached_at)
+                       for race_id, odds_data, race_info in items]
+
+        saved_count = 0
+        race_infos_by_date: Dict[str, Dict[str, Dict]] = {}
+        for (race_id, _, race_info), entry in zip(items, entries):
+            if entry is not None:
+                self._index_put(race_id, entry)
+                saved_count += 1
+                race_infos_by_date.setdefault(race_id[:8], {})[race_id] = race_info or {}
+            else:
+                self._ensured_dirs.discard(race_id[:8])
+
+        for date, race_infos in race_infos_by_date.items():
+            self._queue_race_infos(date, race_infos)
+        self.flush()
+
+        logger.info(f"Odds cached in batch: {saved_count} races")
+        return saved_count
 
     def load_odds(self, race_id: str) -> Optional[Dict]:
         """
@@ -125,15 +562,13 @@ class OddsCache:
             Optional[Dict]: キャッシュされたデータ、存在しない場合はNone
         """
         try:
-            cache_path = self._get_cache_path(race_id)
-
-            if not cache_path.exists():
+            # 存在確認のstatは行わず、開けなければキャッシュなしとする
+            try:
+                data = jsonutil.load_file(self._get_cache_path(race_id))
+            except FileNotFoundError:
                 logger.debug(f"Cache not found: {race_id}")
                 return None
 
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
             logger.info(f"Odds loaded from cache: {race_id}")
             return data
 
@@ -141,6 +576,47 @@ class OddsCache:
             logger.error(f"Failed to load odds cache: {e}")
             return None
 
+    def load_race_infos(self, date: str) -> Dict[str, Dict]:
+        """
+        指定日のレース情報をまとめて読み込み
+
+        日付ごとのインデックスから1回の読み込みで取得する。
+        インデックスがない古いキャッシュは各ファイルから作成して保存する
+
+        Args:
+            date: 日付 (YYYYMMDD)
+
+        Returns:
+            Dict[str, Dict]: {レースID: レース情報}
+        """
+        index_path = self._get_race_index_path(date)
+        race_infos = None
+        try:
+            race_infos = jsonutil.load_file(index_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to load race info index for {date}, rebuilding: {e}")
+
+        if race_infos is not None:
+            # まだ書き込んでいない更新を反映
+            for race_id, race_info in self._pending_race_infos.get(date, {}).items():
+                if race_info is None:
+                    race_infos.pop(race_id, None)
+                else:
+                    race_infos[race_id] = race_info
+            return race_infos
+
+        race_infos = {}
+        for race_id in self.get_cached_races(date):
+            data = self.load_odds(race_id)
+            if data is not None:
+                race_infos[race_id] = data.get('race_info') or {}
+
+        if race_infos:
+            self._update_race_infos(date, race_infos, replace=True)
+        return race_infos
+
     def has_cache(self, race_id: str) -> bool:
         """
         指定レースのキャッシュが存在するか確認
@@ -151,7 +627,7 @@ class OddsCache:
         Returns:
             bool: キャッシュが存在すればTrue
         """
-        return self._get_cache_path(race_id).exists()
+        return self._get_cache_path(race_id).is_file()
 
     def delete_cache(self, race_id: str) -> bool:
         """
@@ -164,20 +640,22 @@ class OddsCache:
             bool: 削除に成功すればTrue
         """
         try:
-            cache_path = self._get_cache_path(race_id)
+            date = race_id[:8]
+            self._begin_update(date)
 
-            if cache_path.exists():
-                cache_path.unlink()
+            # 存在確認のstatは行わず、削除できなければキャッシュなしとする
+            try:
+                self._get_cache_path(race_id).unlink()
+            except FileNotFoundError:
+                return False
 
-                # インデックスからも削除
-                if race_id in self.index:
-                    del self.index[race_id]
-                    self._save_index()
+            # インデックスからも削除
+            self._index_remove(race_id)
+            self._queue_race_infos(date, {race_id: None})
+            self._mark_index_dirty()
 
-                logger.info(f"Cache deleted: {race_id}")
-                return True
-
-            return False
+            logger.info(f"Cache deleted: {race_id}")
+            return True
 
         except Exception as e:
             logger.error(f"Failed to delete cache: {e}")
@@ -197,8 +675,10 @@ class OddsCache:
             time_series_data: 時系列オッズデータ
             race_info: レース情報（オプション）
         """
+        date = race_id[:8]
+        self._begin_update(date)
         try:
-            cache_path = self._get_cache_path(race_id)
+            cache_path = self._get_cache_path(race_id, create=True)
 
             data = {
                 'race_id': race_id,
@@ -208,21 +688,18 @@ class OddsCache:
                 'odds_timeline': time_series_data
             }
 
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # レースごとのオッズファイルは件数が多いため、インデントなしで書き込む
+            jsonutil.dump_file(cache_path, data, indent=False)
 
             # インデックスを更新
-            self.index[race_id] = {
-                'cached_at': data['cached_at'],
-                'file_path': str(cache_path),
-                'data_type': 'time_series',
-                'timeline_count': len(time_series_data)
-            }
-            self._save_index()
+            self._index_put(race_id, _index_entry(data, cache_path))
+            self._queue_race_infos(date, {race_id: race_info or {}})
+            self._mark_index_dirty()
 
             logger.info(f"Time-series odds cached: {race_id} ({len(time_series_data)} points)")
 
         except Exception as e:
+            self._ensured_dirs.discard(date)
             logger.error(f"Failed to save time-series odds cache: {e}")
 
     def get_cached_races(self, date: Optional[str] = None) -> List[str]:
@@ -236,6 +713,8 @@ class OddsCache:
             List[str]: レースIDのリスト
         """
         if date:
+            if len(date) == 8:
+                return list(self._races_by_date.get(date, ()))
             return [race_id for race_id in self.index.keys() if race_id.startswith(date)]
         return list(self.index.keys())
 
@@ -247,11 +726,10 @@ class OddsCache:
             Dict: 統計情報
         """
         total_races = len(self.index)
-        dates = set(race_id[:8] for race_id in self.index.keys())
 
         return {
             'total_races': total_races,
-            'total_dates': len(dates),
+            'total_dates': len(self._races_by_date),
             'cache_dir': str(self.cache_dir),
             'index_file': str(self.index_file)
         }
@@ -277,6 +755,7 @@ class OddsCache:
             except Exception as e:
                 logger.warning(f"Failed to check cache age for {race_id}: {e}")
 
+        self.flush()
         logger.info(f"Cleared {deleted_count} old cache entries")
 
 
@@ -323,4 +802,5 @@ if __name__ == "__main__":
     for key, value in stats.items():
         print(f"  {key}: {value}")
 
+    cache.close()
     print("\nTest completed")
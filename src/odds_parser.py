@@ -4,15 +4,45 @@ JRA-VANオッズデータ詳細パーサー
 各オッズレコード（O1-O6）の詳細なパース処理を実装
 """
 
+import re
+from functools import lru_cache
 from typing import Dict, List, Optional
 from datetime import datetime
 
+from .time_manager import TimeManager
+
+# 各オッズレコードの繰り返しエントリ（固定長）を切り出す正規表現
+# 単勝（馬番2バイト + オッズ5バイト = 7バイト）
+_TANSHO_ENTRY_PATTERN = re.compile(r'(.{2})(.{5})', re.DOTALL)
+# 複勝（馬番2バイト + 最低オッズ5バイト + 最高オッズ5バイト + その他2バイト = 14バイト）
+_FUKUSHO_ENTRY_PATTERN = re.compile(r'(.{2})(.{5})(.{5}).{2}', re.DOTALL)
+# 枠連（枠番1バイト × 2 + オッズ5バイト + その他2バイト = 9バイト）
+_WAKUREN_ENTRY_PATTERN = re.compile(r'(.)(.)(.{5}).{2}', re.DOTALL)
+# 三連複・三連単（馬番2バイト × 3 + オッズ7バイト + その他4バイト = 17バイト）
+_SANREN_ENTRY_PATTERN = re.compile(r'(.{2})(.{2})(.{2})(.{7}).{4}', re.DOTALL)
+
+
+@lru_cache(maxsize=4096)
+def _format_odds_time(hhmmss: str) -> str:
+    """
+    HHMMSS形式のオッズ時刻をHH:MM:SS形式に変換
+
+    同じ取得バッチのレコードはオッズ時刻が共通なため結果をキャッシュする
+
+    Args:
+        hhmmss: オッズ時刻 (HHMMSS形式、6文字)
+
+    Returns:
+        str: HH:MM:SS形式の時刻
+    """
+    return f"{hhmmss[0:2]}:{hhmmss[2:4]}:{hhmmss[4:6]}"
+
 
 class OddsParser:
     """オッズデータのパーサークラス"""
 
     @staticmethod
-    def parse_tansho_fukusho(buff: str) -> Dict:
+    def parse_tansho_fukusho(buff: str, parsed_at: Optional[str] = None) -> Dict:
         """
         単勝・複勝オッズ（O1レコード）をパース
 
@@ -26,6 +56,7 @@ class OddsParser:
 
         Args:
             buff: データバッファ
+            parsed_at: パース時刻（ISO形式、Noneの場合は現在時刻）
 
         Returns:
             Dict: パースされた単勝・複勝オッズ
@@ -39,49 +70,47 @@ class OddsParser:
                 'odds_time': buff[19:25].strip(),
                 'tansho': [],
                 'fukusho': [],
-                'parsed_at': datetime.now().isoformat()
+                'parsed_at': parsed_at or datetime.now().isoformat()
             }
 
             # オッズ時刻をフォーマット
             if len(odds_data['odds_time']) == 6:
-                time_str = odds_data['odds_time']
-                odds_data['odds_time_formatted'] = f"{time_str[0:2]}:{time_str[2:4]}:{time_str[4:6]}"
+                odds_data['odds_time_formatted'] = _format_odds_time(odds_data['odds_time'])
 
             # 単勝オッズ部分のパース (位置26以降)
             # 実際の仕様に基づいて実装が必要
             # ここでは基本構造のみ示す
             tansho_start = 25
-            for i in range(18):  # 最大18頭
-                pos = tansho_start + (i * 7)
-                if pos + 7 <= len(buff):
-                    umaban = buff[pos:pos+2].strip()
-                    odds = buff[pos+2:pos+7].strip()
-                    if umaban and odds:
-                        try:
-                            odds_data['tansho'].append({
-                                'umaban': int(umaban),
-                                'odds': float(odds) / 10  # オッズは10倍値で格納
-                            })
-                        except ValueError:
-                            continue
+            tansho = odds_data['tansho']
+            for umaban, odds in _TANSHO_ENTRY_PATTERN.findall(buff, tansho_start, tansho_start + 18 * 7):  # 最大18頭
+                umaban = umaban.strip()
+                odds = odds.strip()
+                if umaban and odds:
+                    try:
+                        tansho.append({
+                            'umaban': int(umaban),
+                            'odds': float(odds) / 10  # オッズは10倍値で格納
+                        })
+                    except ValueError:
+                        continue
 
             # 複勝オッズ部分のパース
             fukusho_start = tansho_start + (18 * 7)
-            for i in range(18):  # 最大18頭
-                pos = fukusho_start + (i * 14)
-                if pos + 14 <= len(buff):
-                    umaban = buff[pos:pos+2].strip()
-                    odds_min = buff[pos+2:pos+7].strip()
-                    odds_max = buff[pos+7:pos+12].strip()
-                    if umaban and odds_min and odds_max:
-                        try:
-                            odds_data['fukusho'].append({
-                                'umaban': int(umaban),
-                                'odds_min': float(odds_min) / 10,
-                                'odds_max': float(odds_max) / 10
-                            })
-                        except ValueError:
-                            continue
+            fukusho = odds_data['fukusho']
+            for umaban, odds_min, odds_max in _FUKUSHO_ENTRY_PATTERN.findall(
+                    buff, fukusho_start, fukusho_start + 18 * 14):  # 最大18頭
+                umaban = umaban.strip()
+                odds_min = odds_min.strip()
+                odds_max = odds_max.strip()
+                if umaban and odds_min and odds_max:
+                    try:
+                        fukusho.append({
+                            'umaban': int(umaban),
+                            'odds_min': float(odds_min) / 10,
+                            'odds_max': float(odds_max) / 10
+                        })
+                    except ValueError:
+                        continue
 
             return odds_data
 
@@ -92,12 +121,13 @@ class OddsParser:
             }
 
     @staticmethod
-    def parse_wakuren(buff: str) -> Dict:
+    def parse_wakuren(buff: str, parsed_at: Optional[str] = None) -> Dict:
         """
         枠連オッズ（O2レコード）をパース
 
         Args:
             buff: データバッファ
+            parsed_at: パース時刻（ISO形式、Noneの場合は現在時刻）
 
         Returns:
             Dict: パースされた枠連オッズ
@@ -110,35 +140,34 @@ class OddsParser:
                 'race_key': buff[3:19].strip(),
                 'odds_time': buff[19:25].strip(),
                 'combinations': [],
-                'parsed_at': datetime.now().isoformat()
+                'parsed_at': parsed_at or datetime.now().isoformat()
             }
 
             # オッズ時刻をフォーマット
             if len(odds_data['odds_time']) == 6:
-                time_str = odds_data['odds_time']
-                odds_data['odds_time_formatted'] = f"{time_str[0:2]}:{time_str[2:4]}:{time_str[4:6]}"
+                odds_data['odds_time_formatted'] = _format_odds_time(odds_data['odds_time'])
 
             # 枠連オッズの組み合わせをパース
             # 実際の仕様書に基づいた実装が必要
             odds_start = 25
             combination_count = 36  # 枠連は最大36通り (8枠の組み合わせ)
+            combinations = odds_data['combinations']
+
+            for waku1, waku2, odds in _WAKUREN_ENTRY_PATTERN.findall(
+                    buff, odds_start, odds_start + combination_count * 9):
+                waku1 = waku1.strip()
+                waku2 = waku2.strip()
+                odds = odds.strip()
 
-            for i in range(combination_count):
-                pos = odds_start + (i * 9)
-                if pos + 9 <= len(buff):
-                    waku1 = buff[pos:pos+1].strip()
-                    waku2 = buff[pos+1:pos+2].strip()
-                    odds = buff[pos+2:pos+7].strip()
-
-                    if waku1 and waku2 and odds:
-                        try:
-                            odds_data['combinations'].append({
-                                'waku1': int(waku1),
-                                'waku2': int(waku2),
-                                'odds': float(odds) / 10
-                            })
-                        except ValueError:
-                            continue
+                if waku1 and waku2 and odds:
+                    try:
+                        combinations.append({
+                            'waku1': int(waku1),
+                            'waku2': int(waku2),
+                            'odds': float(odds) / 10
+                        })
+                    except ValueError:
+                        continue
 
             return odds_data
 
@@ -149,12 +178,13 @@ class OddsParser:
             }
 
     @staticmethod
-    def parse_umaren(buff: str) -> Dict:
+    def parse_umaren(buff: str, parsed_at: Optional[str] = None) -> Dict:
         """
         馬連オッズ（O3レコード）をパース
 
         Args:
             buff: データバッファ
+            parsed_at: パース時刻（ISO形式、Noneの場合は現在時刻）
 
         Returns:
             Dict: パースされた馬連オッズ
@@ -167,7 +197,7 @@ class OddsParser:
                 'race_key': buff[3:19].strip(),
                 'odds_time': buff[19:25].strip(),
                 'combinations': [],
-                'parsed_at': datetime.now().isoformat()
+                'parsed_at': parsed_at or datetime.now().isoformat()
             }
 
             return odds_data
@@ -179,12 +209,13 @@ class OddsParser:
             }
 
     @staticmethod
-    def parse_wide(buff: str) -> Dict:
+    def parse_wide(buff: str, parsed_at: Optional[str] = None) -> Dict:
         """
         ワイドオッズ（O4レコード）をパース
 
         Args:
             buff: データバッファ
+            parsed_at: パース時刻（ISO形式、Noneの場合は現在時刻）
 
         Returns:
             Dict: パースされたワイドオッズ
@@ -197,7 +228,7 @@ class OddsParser:
                 'race_key': buff[3:19].strip(),
                 'odds_time': buff[19:25].strip(),
                 'combinations': [],
-                'parsed_at': datetime.now().isoformat()
+                'parsed_at': parsed_at or datetime.now().isoformat()
             }
 
             return odds_data
@@ -209,12 +240,13 @@ class OddsParser:
             }
 
     @staticmethod
-    def parse_umatan(buff: str) -> Dict:
+    def parse_umatan(buff: str, parsed_at: Optional[str] = None) -> Dict:
         """
         馬単オッズ（O5レコード）をパース
 
         Args:
             buff: データバッファ
+            parsed_at: パース時刻（ISO形式、Noneの場合は現在時刻）
 
         Returns:
             Dict: パースされた馬単オッズ
@@ -227,7 +259,7 @@ class OddsParser:
                 'race_key': buff[3:19].strip(),
                 'odds_time': buff[19:25].strip(),
                 'combinations': [],
-                'parsed_at': datetime.now().isoformat()
+                'parsed_at': parsed_at or datetime.now().isoformat()
             }
 
             return odds_data
@@ -239,12 +271,13 @@ class OddsParser:
             }
 
     @staticmethod
-    def parse_sanrenpuku_sanrentan(buff: str) -> Dict:
+    def parse_sanrenpuku_sanrentan(buff: str, parsed_at: Optional[str] = None) -> Dict:
         """
         三連複・三連単オッズ（O6レコード）をパース
 
         Args:
             buff: データバッファ
+            parsed_at: パース時刻（ISO形式、Noneの場合は現在時刻）
 
         Returns:
             Dict: パースされた三連複・三連単オッズ
@@ -258,54 +291,40 @@ class OddsParser:
                 'race_key': buff[3:19].strip(),
                 'odds_time': buff[19:25].strip() if len(buff) > 25 else '',
                 'odds_data': {},
-                'parsed_at': datetime.now().isoformat()
+                'parsed_at': parsed_at or datetime.now().isoformat()
             }
 
             # オッズデータ部分の開始位置（ヘッダー40バイト）
             HEADER_LEN = 40
-            ENTRY_LEN = 17  # 馬番6バイト + その他4バイト + オッズ7バイト
 
             if len(buff) <= HEADER_LEN:
                 return odds_data
 
-            odds_part = buff[HEADER_LEN:]
-
-            # エントリをパース
-            num_entries = len(odds_part) // ENTRY_LEN
-
-            for i in range(num_entries):
-                start = i * ENTRY_LEN
-                end = start + ENTRY_LEN
-
-                if end > len(odds_part):
-                    break
-
-                entry = odds_part[start:end]
+            combos = odds_data['odds_data']
 
+            # 17バイトごとのエントリを正規表現でまとめて切り出す（末尾の半端なデータは無視）
+            for uma1, uma2, uma3, odds_str in _SANREN_ENTRY_PATTERN.findall(buff, HEADER_LEN):
                 # 馬番（2バイト × 3）
-                uma1 = entry[0:2].strip()
-                uma2 = entry[2:4].strip()
-                uma3 = entry[4:6].strip()
+                uma1 = uma1.strip()
+                uma2 = uma2.strip()
+                uma3 = uma3.strip()
 
-                # オッズ値（位置6-13の7バイト、10で割る）
-                odds_str = entry[6:13].strip()
+                # オッズ値（7バイト、10で割る）
+                odds_str = odds_str.strip()
 
                 if uma1 and uma2 and uma3 and odds_str:
                     try:
-                        # 馬番の組み合わせをキーに
-                        combo_key = f"{uma1}-{uma2}-{uma3}"
-
                         # オッズ値を計算
                         odds_value = float(odds_str) / 10.0
-
-                        # 0.0倍のデータは除外（発売されていない組み合わせ）
-                        if odds_value > 0.0:
-                            odds_data['odds_data'][combo_key] = odds_value
-
                     except ValueError:
                         # パースエラーはスキップ
                         continue
 
+                    # 0.0倍のデータは除外（発売されていない組み合わせ）
+                    if odds_value > 0.0:
+                        # 馬番の組み合わせをキーに
+                        combos[f"{uma1}-{uma2}-{uma3}"] = odds_value
+
             return odds_data
 
         except Exception as e:
@@ -315,12 +334,13 @@ class OddsParser:
             }
 
 
-def parse_jg_record(buff: str) -> Dict:
+def parse_jg_record(buff: str, parsed_at: Optional[str] = None) -> Dict:
     """
     時系列オッズ情報（JGレコード）をパース
 
     Args:
         buff: データバッファ
+        parsed_at: パース時刻（ISO形式、Noneの場合は現在時刻）
 
     Returns:
         Dict: パースされた時系列オッズデータ
@@ -333,13 +353,13 @@ def parse_jg_record(buff: str) -> Dict:
 
         race_id = buff[11:27].strip() if len(buff) > 27 else ""
         post_time_raw = buff[27:31] if len(buff) > 31 else "1000"
-        post_time = f"{post_time_raw[:2]}:{post_time_raw[2:]}" if len(post_time_raw) == 4 else "10:00"
+        post_time = TimeManager.format_post_time(post_time_raw) if len(post_time_raw) == 4 else "10:00"
         odds_time = buff[31:37] if len(buff) > 37 else ""
 
         # 時刻フォーマット
         odds_time_formatted = ""
         if len(odds_time) == 6:
-            odds_time_formatted = f"{odds_time[0:2]}:{odds_time[2:4]}:{odds_time[4:6]}"
+            odds_time_formatted = _format_odds_time(odds_time)
 
         return {
             'record_type': '時系列オッズ',
@@ -351,7 +371,7 @@ def parse_jg_record(buff: str) -> Dict:
             'tansho': [],  # JGレコードには簡易オッズ情報が含まれる
             'fukusho': [],
             'raw_data': buff,
-            'parsed_at': datetime.now().isoformat()
+            'parsed_at': parsed_at or datetime.now().isoformat()
         }
     except Exception as e:
         return {
@@ -360,20 +380,21 @@ def parse_jg_record(buff: str) -> Dict:
         }
 
 
-def parse_odds_record(record_id: str, buff: str) -> Dict:
+def parse_odds_record(record_id: str, buff: str, parsed_at: Optional[str] = None) -> Dict:
     """
     オッズレコードをパース（統合関数）
 
     Args:
         record_id: レコードID (O1-O6, JG)
         buff: データバッファ
+        parsed_at: パース時刻（ISO形式、Noneの場合は現在時刻）
 
     Returns:
         Dict: パースされたオッズデータ
     """
     # JGレコードの場合
     if record_id == 'JG':
-        return parse_jg_record(buff)
+        return parse_jg_record(buff, parsed_at)
 
     parser = OddsParser()
 
@@ -388,7 +409,7 @@ def parse_odds_record(record_id: str, buff: str) -> Dict:
 
     parser_func = parsers.get(record_id)
     if parser_func:
-        return parser_func(buff)
+        return parser_func(buff, parsed_at)
     else:
         return {
             'error': f'未対応のレコードID: {record_id}',
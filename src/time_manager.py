@@ -5,8 +5,11 @@
 """
 
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Tuple
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple
+import copy
 import logging
+import random
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +18,13 @@ class TimeManager:
     """時刻管理クラス"""
 
     @staticmethod
+    @lru_cache(maxsize=4096)
     def parse_race_datetime(race_id: str, post_time: str) -> Optional[datetime]:
         """
         レースIDと発走時刻からdatetimeオブジェクトを生成
 
+        同じレースへのポーリングで再パースしないよう結果をキャッシュする
+
         Args:
             race_id: レースID (YYYYMMDDJJKKRR)
             post_time: 発走時刻 (HH:MM形式)
@@ -44,6 +50,22 @@ class TimeManager:
             logger.error(f"日時パースエラー: {e}")
             return None
 
+    @staticmethod
+    @lru_cache(maxsize=1440)
+    def format_post_time(hhmm: str) -> str:
+        """
+        HHMM形式の発走時刻をHH:MM形式に変換
+
+        取りうる値は1日の分数（1440通り）に限られるため結果をキャッシュする
+
+        Args:
+            hhmm: 発走時刻 (HHMM形式)
+
+        Returns:
+            str: 発走時刻 (HH:MM形式)
+        """
+        return hhmm[:2] + ':' + hhmm[2:]
+
     @staticmethod
     def calculate_deadline(post_time: datetime, margin_seconds: int = 60) -> datetime:
         """
@@ -115,6 +137,31 @@ class TimeManager:
         """
         return deadline - timedelta(seconds=seconds_before)
 
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _deadline_base(
+        race_id: str,
+        post_time: str,
+        deadline_margin: int
+    ) -> Optional[Tuple[datetime, str, str]]:
+        """
+        レースごとに変化しない締め切り情報を計算（結果をキャッシュ）
+
+        Args:
+            race_id: レースID
+            post_time: 発走時刻
+            deadline_margin: 締め切り余裕時間（秒）
+
+        Returns:
+            Optional[Tuple[datetime, str, str]]: (締め切り時刻, 発走時刻のISO形式, 締め切り時刻のISO形式)
+        """
+        post_datetime = TimeManager.parse_race_datetime(race_id, post_time)
+        if not post_datetime:
+            return None
+
+        deadline = TimeManager.calculate_deadline(post_datetime, deadline_margin)
+        return deadline, post_datetime.isoformat(), deadline.isoformat()
+
     @staticmethod
     def get_deadline_info(
         race_id: str,
@@ -137,22 +184,23 @@ class TimeManager:
         if current_time is None:
             current_time = datetime.now()
 
-        post_datetime = TimeManager.parse_race_datetime(race_id, post_time)
+        # 現在時刻に依存しない部分はレースごとにキャッシュしたものを使う
+        base = TimeManager._deadline_base(race_id, post_time, deadline_margin)
 
-        if not post_datetime:
+        if base is None:
             return {
                 'error': '日時パースエラー',
                 'is_past': False,
                 'seconds_until_deadline': None
             }
 
-        deadline = TimeManager.calculate_deadline(post_datetime, deadline_margin)
-        is_past = TimeManager.is_past_race(deadline, current_time)
-        seconds_until = TimeManager.get_seconds_until_deadline(deadline, current_time)
+        deadline, post_time_iso, deadline_iso = base
+        is_past = current_time > deadline
+        seconds_until = int((deadline - current_time).total_seconds())
 
         return {
-            'post_time': post_datetime.isoformat(),
-            'deadline': deadline.isoformat(),
+            'post_time': post_time_iso,
+            'deadline': deadline_iso,
             'current_time': current_time.isoformat(),
             'is_past': is_past,
             'seconds_until_deadline': seconds_until,
@@ -195,7 +243,11 @@ class TimeManager:
 
 
 class HistoricalOddsSimulator:
-    """過去オッズシミュレーター"""
+    """
+    過去オッズシミュレーター
+
+    状態を持たないため、1つのインスタンスを複数スレッドから共有してよい
+    """
 
     @staticmethod
     def get_odds_at_time(
@@ -253,8 +305,6 @@ class HistoricalOddsSimulator:
         Returns:
             Dict: 補間されたオッズ
         """
-        import copy
-
         interpolated = copy.deepcopy(odds_before)
         record_id = interpolated.get('record_id', '')
 
@@ -307,35 +357,28 @@ class HistoricalOddsSimulator:
         return interpolated
 
     @staticmethod
-    def simulate_odds_at_time(
-        current_odds: Dict,
-        target_seconds_before: int,
-        variance_factor: float = 0.1
-    ) -> Dict:
+    def _calculate_variance(target_seconds_before: int, variance_factor: float) -> float:
         """
-        指定時刻のオッズをシミュレート
-
-        締め切り前のオッズは、現在のオッズから逆算してシミュレート
-
-        Args:
-            current_odds: 現在のオッズ
-            target_seconds_before: 締め切りの何秒前のオッズか
-            variance_factor: 変動係数（0.1 = ±10%）
+        締め切り前の秒数から変動幅を計算
 
-        Returns:
-            Dict: シミュレートされたオッズ
+        時間が遡るほど変動を大きくする
+        締め切り直前: 変動小
+        締め切り遠い: 変動大
         """
-        import copy
-        import random
-
-        simulated = copy.deepcopy(current_odds)
-
-        # 時間が遡るほど変動を大きくする
-        # 締め切り直前: 変動小
-        # 締め切り遠い: 変動大
         time_factor = min(target_seconds_before / 3600.0, 1.0)  # 最大1時間
-        variance = variance_factor * (1.0 + time_factor)
+        return variance_factor * (1.0 + time_factor)
+
+    @staticmethod
+    def _apply_variation(simulated: Dict, low: float, high: float, uniform) -> None:
+        """
+        オッズにランダムな変動を加える（インプレース）
 
+        Args:
+            simulated: 変動を加えるオッズ（コピー済みであること）
+            low: 変動倍率の下限
+            high: 変動倍率の上限
+            uniform: 乱数関数（random.uniform互換）
+        """
         record_id = simulated.get('record_id', '')
 
         # 単勝・複勝
@@ -343,21 +386,19 @@ class HistoricalOddsSimulator:
             # 単勝オッズ
             if 'tansho' in simulated:
                 for item in simulated['tansho']:
-                    base_odds = item['odds']
-                    variation = random.uniform(1.0 - variance, 1.0 + variance)
-                    item['odds'] = round(base_odds * variation, 1)
+                    item['odds'] = round(item['odds'] * uniform(low, high), 1)
 
             # 複勝オッズ
             if 'fukusho' in simulated:
                 for item in simulated['fukusho']:
-                    variation = random.uniform(1.0 - variance, 1.0 + variance)
+                    variation = uniform(low, high)
                     item['odds_min'] = round(item['odds_min'] * variation, 1)
                     item['odds_max'] = round(item['odds_max'] * variation, 1)
 
         # その他のオッズ
         elif 'combinations' in simulated:
             for item in simulated['combinations']:
-                variation = random.uniform(1.0 - variance, 1.0 + variance)
+                variation = uniform(low, high)
                 if 'odds' in item:
                     item['odds'] = round(item['odds'] * variation, 1)
                 if 'odds_min' in item:
@@ -365,12 +406,65 @@ class HistoricalOddsSimulator:
                 if 'odds_max' in item:
                     item['odds_max'] = round(item['odds_max'] * variation, 1)
 
-        # メタ情報を追加
-        simulated['simulated'] = True
-        simulated['target_seconds_before_deadline'] = target_seconds_before
-        simulated['variance_applied'] = variance
+    @staticmethod
+    def simulate_odds_at_time(
+        current_odds: Dict,
+        target_seconds_before: int,
+        variance_factor: float = 0.1
+    ) -> Dict:
+        """
+        指定時刻のオッズをシミュレート
+
+        締め切り前のオッズは、現在のオッズから逆算してシミュレート
+
+        Args:
+            current_odds: 現在のオッズ
+            target_seconds_before: 締め切りの何秒前のオッズか
+            variance_factor: 変動係数（0.1 = ±10%）
+
+        Returns:
+            Dict: シミュレートされたオッズ
+        """
+        return HistoricalOddsSimulator.simulate_odds_batch(
+            [current_odds], target_seconds_before, variance_factor
+        )[0]
+
+    @staticmethod
+    def simulate_odds_batch(
+        odds_list: List[Dict],
+        target_seconds_before: int,
+        variance_factor: float = 0.1
+    ) -> List[Dict]:
+        """
+        複数のオッズをまとめてシミュレート
+
+        変動幅の計算とコピーをリスト全体で1回に抑える
+
+        Args:
+            odds_list: 現在のオッズのリスト
+            target_seconds_before: 締め切りの何秒前のオッズか
+            variance_factor: 変動係数（0.1 = ±10%）
+
+        Returns:
+            List[Dict]: シミュレートされたオッズのリスト
+        """
+        simulated_list = copy.deepcopy(odds_list)
+
+        variance = HistoricalOddsSimulator._calculate_variance(target_seconds_before, variance_factor)
+        low = 1.0 - variance
+        high = 1.0 + variance
+        apply_variation = HistoricalOddsSimulator._apply_variation
+        uniform = random.uniform
+
+        for simulated in simulated_list:
+            apply_variation(simulated, low, high, uniform)
+
+            # メタ情報を追加
+            simulated['simulated'] = True
+            simulated['target_seconds_before_deadline'] = target_seconds_before
+            simulated['variance_applied'] = variance
 
-        return simulated
+        return simulated_list
 
 
 if __name__ == "__main__":
@@ -0,0 +1,265 @@
+"""
+APIサーバーのテスト
+
+同じプロセスで起動・終了を繰り返してもAPIが動作するか、
+リアルタイムオッズの短期キャッシュが上流からの取得をまとめるか確認します。
+"""
+
+import asyncio
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+# 環境変数を設定（テスト用）
+os.environ.setdefault('ENVIRONMENT', 'development')
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import api_server
+from src.config import Config
+
+# mock_data/sample_odds.json に含まれるレース
+MOCK_RACE_ID = "2024010105010101"
+
+
+def test_restart_lifespan():
+    """起動・終了を2回繰り返しても、データサービス用のワーカースレッドが使える"""
+    for _ in range(2):
+        with TestClient(api_server.app) as client:
+            response = client.get(f"/api/odds/{MOCK_RACE_ID}", params={'data_source': 'mock'})
+            assert response.status_code == 200, response.text
+            assert response.json()['race_id'] == MOCK_RACE_ID
+
+        # 終了時にワーカースレッドは停止・破棄される
+        assert api_server._data_executor is None
+
+
+class _FakeDataService:
+    """get_realtime_odds の呼び出し回数を数えるデータサービス"""
+
+    def __init__(self):
+        self.calls = []
+        self.results = {}
+
+    def get_realtime_odds(self, race_id, seconds_before_deadline=None, data_source="auto"):
+        self.calls.append((race_id, seconds_before_deadline, data_source))
+        return self.results.get(race_id, {'race_id': race_id, 'odds': [{'n': len(self.calls)}]})
+
+    def get_status(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_service(monkeypatch):
+    """短期キャッシュを空にし、データサービスを差し替える"""
+    service = _FakeDataService()
+    monkeypatch.setattr(api_server, 'data_service', service)
+    monkeypatch.setattr(api_server, '_odds_cache', {})
+    monkeypatch.setattr(api_server, '_odds_inflight', {})
+    yield service
+    if api_server._data_executor is not None:
+        api_server._data_executor.shutdown(wait=True)
+        api_server._data_executor = None
+
+
+def _fetch(*args, **kwargs):
+    """イベントループを起動して _get_realtime_odds_cached を1回呼び出す"""
+    return asyncio.run(api_server._get_realtime_odds_cached(*args, **kwargs))
+
+
+def test_odds_cache_key(fake_service):
+    """同じ (レースID, 締め切り前秒数, データソース) はキャッシュから返す"""
+    first = _fetch(MOCK_RACE_ID)
+    assert _fetch(MOCK_RACE_ID) is first
+    assert len(fake_service.calls) == 1
+
+    # キーのいずれかが違えば取得し直す
+    _fetch(MOCK_RACE_ID, 300)
+    _fetch(MOCK_RACE_ID, data_source='mock')
+    _fetch("2024010105010102")
+    assert fake_service.calls == [
+        (MOCK_RACE_ID, None, 'auto'),
+        (MOCK_RACE_ID, 300, 'auto'),
+        (MOCK_RACE_ID, None, 'mock'),
+        ("2024010105010102", None, 'auto'),
+    ]
+
+
+def test_odds_cache_expiry(fake_service, monkeypatch):
+    """TTLを過ぎたエントリは使わずに取得し直す"""
+    clock = [1000.0]
+    monkeypatch.setattr(api_server, 'time', SimpleNamespace(monotonic=lambda: clock[0]))
+
+    _fetch(MOCK_RACE_ID)
+    clock[0] += api_server._ODDS_CACHE_TTL - 0.1
+    _fetch(MOCK_RACE_ID)
+    assert len(fake_service.calls) == 1
+
+    clock[0] += 0.1
+    assert _fetch(MOCK_RACE_ID)['odds'] == [{'n': 2}]
+    assert len(fake_service.calls) == 2
+
+
+def test_odds_cache_refresh(fake_service):
+    """refresh=True はキャッシュを使わずに取得し、結果をキャッシュに入れ直す"""
+    _fetch(MOCK_RACE_ID)
+    refreshed = _fetch(MOCK_RACE_ID, refresh=True)
+
+    assert len(fake_service.calls) == 2
+    assert _fetch(MOCK_RACE_ID) is refreshed
+
+
+def test_odds_cache_skips_errors(fake_service):
+    """エラー結果はキャッシュしない"""
+    fake_service.results[MOCK_RACE_ID] = {'error': 'not found'}
+
+    _fetch(MOCK_RACE_ID)
+    _fetch(MOCK_RACE_ID)
+
+    assert len(fake_service.calls) == 2
+    assert api_server._odds_cache == {}
+
+
+class _BlockingDataService(_FakeDataService):
+    """release されるまで get_realtime_odds を返さないデータサービス"""
+
+    def __init__(self, error: Exception = None):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.error = error
+
+    def get_realtime_odds(self, race_id, seconds_before_deadline=None, data_source="auto"):
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error is not None:
+            self.calls.append((race_id, seconds_before_deadline, data_source))
+            raise self.error
+        return super().get_realtime_odds(race_id, seconds_before_deadline, data_source)
+
+
+async def _wait_started(service: _BlockingDataService):
+    """上流の取得が始まるまで待つ"""
+    await asyncio.get_running_loop().run_in_executor(None, service.started.wait, 5)
+
+
+def test_concurrent_fetches_coalesce(fake_service, monkeypatch):
+    """同じキーの同時リクエストは1回の取得を共有する"""
+    service = _BlockingDataService()
+    monkeypatch.setattr(api_server, 'data_service', service)
+
+    async def scenario():
+        callers = [asyncio.ensure_future(api_server._get_realtime_odds_cached(MOCK_RACE_ID)) for _ in range(3)]
+        await _wait_started(service)
+        assert list(api_server._odds_inflight) == [(MOCK_RACE_ID, None, 'auto')]
+        service.release.set()
+        return await asyncio.gather(*callers)
+
+    results = asyncio.run(scenario())
+
+    assert len(service.calls) == 1
+    assert results[0] is results[1] is results[2]
+    assert api_server._odds_inflight == {}
+
+
+def test_cancelled_caller_does_not_cancel_shared_fetch(fake_service, monkeypatch):
+    """相乗りしている呼び出しの1つがキャンセルされても、他の呼び出しは結果を受け取る"""
+    service = _BlockingDataService()
+    monkeypatch.setattr(api_server, 'data_service', service)
+
+    async def scenario():
+        cancelled = asyncio.ensure_future(api_server._get_realtime_odds_cached(MOCK_RACE_ID))
+        waiting = asyncio.ensure_future(api_server._get_realtime_odds_cached(MOCK_RACE_ID))
+        await _wait_started(service)
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+        service.release.set()
+        return await waiting
+
+    result = asyncio.run(scenario())
+
+    assert result['odds'] == [{'n': 1}]
+    assert len(service.calls) == 1
+    assert api_server._odds_inflight == {}
+    # 取得した結果はキャッシュされている
+    assert _fetch(MOCK_RACE_ID) is result
+    assert len(service.calls) == 1
+
+
+def test_failed_fetch_is_not_kept_inflight(fake_service, monkeypatch):
+    """取得が例外になった場合は全ての呼び出しに送出し、進行中の取得から外す"""
+    service = _BlockingDataService(error=RuntimeError("JV-Link error"))
+    monkeypatch.setattr(api_server, 'data_service', service)
+
+    async def scenario():
+        callers = [asyncio.ensure_future(api_server._get_realtime_odds_cached(MOCK_RACE_ID)) for _ in range(2)]
+        await _wait_started(service)
+        service.release.set()
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+    assert len(service.calls) == 1
+    assert api_server._odds_inflight == {}
+    assert api_server._odds_cache == {}
+
+    # 次の呼び出しは取得し直す
+    with pytest.raises(RuntimeError):
+        _fetch(MOCK_RACE_ID)
+    assert len(service.calls) == 2
+
+
+def _wait_until(condition, timeout=5.0):
+    """条件が満たされるまで待つ（サーバー側の切断処理は別スレッドで進むため）"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_websocket_producer_per_race(fake_service, monkeypatch):
+    """同じレースの購読者は1つの配信タスクを共有し、最後の購読者の切断で停止する"""
+    monkeypatch.setattr(api_server, 'get_data_service', lambda: fake_service)
+    monkeypatch.setattr(api_server, '_ODDS_CACHE_TTL', 0)
+    monkeypatch.setattr(Config, 'REALTIME_UPDATE_INTERVAL', 0.05)
+    manager = api_server.manager
+    key = (MOCK_RACE_ID, 'auto')
+
+    with TestClient(api_server.app) as client:
+        with client.websocket_connect(f"/ws/odds/{MOCK_RACE_ID}") as first:
+            assert first.receive_json()['type'] == 'initial'
+
+            with client.websocket_connect(f"/ws/odds/{MOCK_RACE_ID}") as second:
+                assert second.receive_json()['type'] == 'initial'
+                assert list(manager._producers) == [key]
+                assert len(manager._subscribers[key]) == 2
+                producer = manager._producers[key]
+
+                # 1回の取得結果が両方の購読者に届く
+                update = second.receive_json()
+                assert update['type'] == 'update'
+                while True:
+                    received = first.receive_json()
+                    if received['odds'] == update['odds']:
+                        break
+                assert received == update
+
+            # 1人が切断しても配信は続く
+            _wait_until(lambda: len(manager._subscribers.get(key, ())) == 1)
+            assert manager._producers[key] is producer
+            assert first.receive_json()['type'] == 'update'
+
+        # 最後の購読者が切断したら配信タスクを停止・削除する
+        _wait_until(lambda: key not in manager._producers)
+        assert key not in manager._subscribers
+        _wait_until(producer.done)
+        assert producer.cancelled()
@@ -0,0 +1,143 @@
+"""
+保存オッズログのテスト
+
+レースごとの追記ログ（[長さ][JSON][長さ]）の読み書きと、
+書き込み途中で壊れたログ・旧形式ファイルの扱いを確認します。
+"""
+
+import json
+
+import pytest
+
+from src import data_service as ds
+from src.config import Config
+
+RACE_ID = "2025010105010101"
+DATE = RACE_ID[:8]
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """保存先を一時ディレクトリにしたDataService"""
+    monkeypatch.setattr(Config, 'ENABLE_DATA_SAVE', True)
+    monkeypatch.setattr(Config, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'ENABLE_HISTORICAL_DATA', False)
+    service = ds.DataService()
+    yield service
+    service.close()
+
+
+def _log_path(tmp_path, race_id=RACE_ID):
+    """保存オッズログのパス"""
+    return tmp_path / race_id[:8] / f"{race_id}{ds.ODDS_LOG_SUFFIX}"
+
+
+def test_round_trip_latest_frame(service):
+    """複数回保存した場合は最新のレコードを読み込む"""
+    for number in range(3):
+        service.save_odds_data(RACE_ID, [{'record_id': 'O1', 'data': number}])
+
+    assert service.load_saved_odds(RACE_ID) == [{'record_id': 'O1', 'data': 2}]
+
+
+def test_torn_tail_returns_last_complete_frame(service, tmp_path):
+    """末尾が書き込み途中で壊れている場合は、その前の完全なレコードを読み込む"""
+    service.save_odds_data(RACE_ID, [{'data': 1}])
+    service.save_odds_data(RACE_ID, [{'data': 2}])
+    service.close()
+
+    # 長さのヘッダーとペイロードの一部だけが書き込まれた状態
+    with open(_log_path(tmp_path), 'ab') as f:
+        f.write(ds._FRAME_LEN.pack(100) + b'{"race_id":')
+
+    assert service.load_saved_odds(RACE_ID) == [{'data': 2}]
+
+
+def test_append_after_torn_tail(service, tmp_path):
+    """壊れた末尾の後に追記したレコードを最新として読み込む"""
+    service.save_odds_data(RACE_ID, [{'data': 1}])
+    service.close()
+
+    with open(_log_path(tmp_path), 'ab') as f:
+        f.write(ds._FRAME_LEN.pack(100) + b'{"race_id":')
+
+    service.save_odds_data(RACE_ID, [{'data': 2}])
+    assert service.load_saved_odds(RACE_ID) == [{'data': 2}]
+
+
+def test_log_shorter_than_frame(service, tmp_path):
+    """長さ情報にも満たないログはデータなしとして扱う"""
+    path = _log_path(tmp_path)
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b'abc')
+
+    assert service.load_saved_odds(RACE_ID) is None
+
+
+def test_legacy_snapshot_fallback(service, tmp_path):
+    """ログがない場合は旧形式（<race_id>_HHMMSS.json）の最新ファイルを読み込む"""
+    date_dir = tmp_path / DATE
+    date_dir.mkdir()
+    for hhmmss, number in (("093000", 1), ("101500", 2), ("094500", 3)):
+        (date_dir / f"{RACE_ID}_{hhmmss}.json").write_text(
+            json.dumps({'race_id': RACE_ID, 'odds': [{'data': number}]}), encoding='utf-8'
+        )
+
+    assert service.load_saved_odds(RACE_ID) == [{'data': 2}]
+
+
+def test_missing_data(service):
+    """保存データがない場合はNone"""
+    assert service.load_saved_odds(RACE_ID) is None
+
+
+def test_open_log_eviction(service, monkeypatch):
+    """開いたままのログが上限を超えた場合は古いものから閉じ、再度開いて追記できる"""
+    monkeypatch.setattr(ds, '_MAX_OPEN_LOGS', 2)
+    race_ids = [f"{DATE}0501010{i}" for i in range(1, 4)]
+
+    for race_id in race_ids:
+        service.save_odds_data(race_id, [{'race': race_id, 'data': 1}])
+
+    assert list(service._open_logs) == race_ids[1:]
+
+    # 閉じたログにも追記できる
+    service.save_odds_data(race_ids[0], [{'race': race_ids[0], 'data': 2}])
+    assert len(service._open_logs) == 2
+
+    assert service.load_saved_odds(race_ids[0]) == [{'race': race_ids[0], 'data': 2}]
+    for race_id in race_ids[1:]:
+        assert service.load_saved_odds(race_id) == [{'race': race_id, 'data': 1}]
+
+
+def test_data_save_disabled(tmp_path, monkeypatch):
+    """保存無効の設定は保存処理と状態表示で同じ値を使う"""
+    monkeypatch.setattr(Config, 'ENABLE_DATA_SAVE', False)
+    monkeypatch.setattr(Config, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'ENABLE_HISTORICAL_DATA', False)
+    service = ds.DataService()
+
+    service.save_odds_data(RACE_ID, [{'data': 1}])
+
+    assert not service.data_save_enabled
+    assert service.get_status()['data_save_enabled'] is False
+    assert not _log_path(tmp_path).exists()
+    service.close()
+
+
+def test_post_time_cache_bounded(service, monkeypatch):
+    """発走時刻キャッシュは上限を超えると古いものから削除する"""
+    monkeypatch.setattr(ds, '_POST_TIME_CACHE_MAXSIZE', 2)
+
+    class _MockProvider:
+        def get_race_detail(self, race_id):
+            return {'post_time': f"10:{race_id[-2:]}"}
+
+    service._mock_provider = _MockProvider()
+    service._mock_loaded = True
+    race_ids = [f"{DATE}0501010{i}" for i in range(1, 4)]
+
+    for race_id in race_ids:
+        assert service._get_post_time(race_id, 'mock') == f"10:{race_id[-2:]}"
+
+    assert list(service._post_time_cache) == race_ids[1:]
@@ -0,0 +1,32 @@
+"""
+モックデータプロバイダーのテスト
+
+リアルタイムオッズのランダムな変動が、読み込んだモックデータに累積しないか確認します。
+"""
+
+import copy
+from pathlib import Path
+
+from src.mock_provider import MockDataProvider
+
+MOCK_DATA_FILE = Path(__file__).resolve().parent.parent / "mock_data" / "sample_odds.json"
+MOCK_RACE_ID = "2024010105010101"
+
+
+def test_realtime_odds_variation_does_not_mutate_mock_data():
+    """get_realtime_odds を繰り返し呼び出しても、元のオッズは変わらない"""
+    provider = MockDataProvider(str(MOCK_DATA_FILE))
+    base_odds = copy.deepcopy(provider.mock_data['races'][MOCK_RACE_ID]['odds'])
+    base_tansho = {item['umaban']: item['odds'] for item in base_odds['O1']['tansho']}
+
+    for _ in range(20):
+        odds_list = provider.get_realtime_odds(MOCK_RACE_ID)
+        assert odds_list
+
+        # 変動は毎回元のオッズに対して±5%以内（前回の変動結果に重ならない）
+        tansho = next(odds for odds in odds_list if odds['record_id'] == 'O1')['tansho']
+        for item in tansho:
+            base = base_tansho[item['umaban']]
+            assert base * 0.95 - 0.05 <= item['odds'] <= base * 1.05 + 0.05
+
+    assert provider.mock_data['races'][MOCK_RACE_ID]['odds'] == base_odds
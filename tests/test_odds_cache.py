@@ -0,0 +1,196 @@
+"""
+オッズキャッシュのテスト
+
+インデックスのまとめ書き込み、異常終了後の復旧、日付ごとのレース情報インデックスを確認します。
+"""
+
+import json
+
+from src.odds_cache import FLUSH_EVERY, OddsCache
+
+DATE = "20250101"
+RACE_IDS = [f"{DATE}0501010{i}" for i in range(1, 4)]
+
+
+def _save_races(cache, race_ids=RACE_IDS):
+    """テスト用のオッズを保存"""
+    for number, race_id in enumerate(race_ids, start=1):
+        cache.save_odds(race_id, [{'record_id': 'O1', 'data': number}], {'race_name': f'Race {number}'})
+
+
+def test_flush_on_close(tmp_path):
+    """close（with文の終了）で未保存のインデックスが書き込まれる"""
+    with OddsCache(str(tmp_path)) as cache:
+        _save_races(cache)
+
+        # FLUSH_EVERY件に達するまでインデックスファイルは書き込まれない
+        assert len(RACE_IDS) < FLUSH_EVERY
+        assert not (tmp_path / "cache_index.json").exists()
+        assert cache.pending_file.exists()
+
+        # 未保存の更新も読み込み結果には反映される
+        assert cache.get_cached_races(DATE) == RACE_IDS
+        assert set(cache.load_race_infos(DATE)) == set(RACE_IDS)
+
+    index = json.loads((tmp_path / "cache_index.json").read_text(encoding='utf-8'))
+    assert list(index) == RACE_IDS
+    race_infos = json.loads((tmp_path / DATE / "_index.json").read_text(encoding='utf-8'))
+    assert race_infos[RACE_IDS[0]] == {'race_name': 'Race 1'}
+    assert not (tmp_path / "cache_index.pending.json").exists()
+
+
+def test_flush_every(tmp_path):
+    """FLUSH_EVERY件の更新でインデックスが書き込まれる"""
+    cache = OddsCache(str(tmp_path))
+    race_ids = [f"{DATE}05{i:06d}" for i in range(FLUSH_EVERY)]
+    _save_races(cache, race_ids)
+
+    index = json.loads((tmp_path / "cache_index.json").read_text(encoding='utf-8'))
+    assert list(index) == race_ids
+    assert not cache.pending_file.exists()
+
+
+def test_recover_after_unclean_exit(tmp_path):
+    """closeせずに終了しても、次回の初期化で両方のインデックスが揃う"""
+    cache = OddsCache(str(tmp_path))
+    _save_races(cache)
+    # closeを呼ばずに破棄（異常終了を想定）
+    del cache
+
+    cache = OddsCache(str(tmp_path))
+    assert cache.get_cached_races(DATE) == RACE_IDS
+    assert set(cache.load_race_infos(DATE)) == set(RACE_IDS)
+    assert cache.load_odds(RACE_IDS[1])['odds'][0]['data'] == 2
+    assert cache.index[RACE_IDS[0]]['odds_count'] == 1
+
+    # 復旧した内容はファイルに保存済み
+    assert not cache.pending_file.exists()
+    index = json.loads((tmp_path / "cache_index.json").read_text(encoding='utf-8'))
+    assert list(index) == RACE_IDS
+
+
+def test_recover_after_unclean_delete(tmp_path):
+    """削除後にcloseせずに終了しても、削除したレースはインデックスに残らない"""
+    with OddsCache(str(tmp_path)) as cache:
+        _save_races(cache)
+
+    cache = OddsCache(str(tmp_path))
+    assert cache.delete_cache(RACE_IDS[0])
+    del cache
+
+    cache = OddsCache(str(tmp_path))
+    assert cache.get_cached_races(DATE) == RACE_IDS[1:]
+    assert set(cache.load_race_infos(DATE)) == set(RACE_IDS[1:])
+
+
+def test_recover_corrupt_index(tmp_path):
+    """インデックスファイルが壊れている場合は各キャッシュファイルから作り直す"""
+    with OddsCache(str(tmp_path)) as cache:
+        _save_races(cache)
+
+    (tmp_path / "cache_index.json").write_text("{broken", encoding='utf-8')
+
+    cache = OddsCache(str(tmp_path))
+    assert cache.get_cached_races(DATE) == RACE_IDS
+    assert cache.get_cache_stats()['total_races'] == len(RACE_IDS)
+
+
+def test_save_many_flushes(tmp_path):
+    """save_manyはバッチの最後にインデックスを書き込む"""
+    cache = OddsCache(str(tmp_path))
+    saved = cache.save_many(
+        (race_id, [{'record_id': 'O1'}], {'race_name': race_id}) for race_id in RACE_IDS
+    )
+
+    assert saved == len(RACE_IDS)
+    assert not cache.pending_file.exists()
+    index = json.loads((tmp_path / "cache_index.json").read_text(encoding='utf-8'))
+    assert list(index) == RACE_IDS
+    race_infos = json.loads((tmp_path / DATE / "_index.json").read_text(encoding='utf-8'))
+    assert set(race_infos) == set(RACE_IDS)
+
+
+def test_race_info_index_created(tmp_path):
+    """保存したレースのレース情報が日付ごとのインデックスにまとめられる"""
+    with OddsCache(str(tmp_path)) as cache:
+        _save_races(cache)
+
+    race_infos = json.loads((tmp_path / DATE / "_index.json").read_text(encoding='utf-8'))
+    assert race_infos == {race_id: {'race_name': f'Race {n}'} for n, race_id in enumerate(RACE_IDS, start=1)}
+    assert OddsCache(str(tmp_path)).load_race_infos(DATE) == race_infos
+
+
+def test_race_info_index_rebuilt_when_missing(tmp_path):
+    """日付ごとのインデックスがない古いキャッシュは各ファイルから作成して保存する"""
+    with OddsCache(str(tmp_path)) as cache:
+        _save_races(cache)
+
+    index_path = tmp_path / DATE / "_index.json"
+    index_path.unlink()
+
+    cache = OddsCache(str(tmp_path))
+    race_infos = cache.load_race_infos(DATE)
+    assert race_infos[RACE_IDS[2]] == {'race_name': 'Race 3'}
+    assert set(race_infos) == set(RACE_IDS)
+    assert json.loads(index_path.read_text(encoding='utf-8')) == race_infos
+
+
+def test_race_info_index_rebuilt_when_corrupt(tmp_path):
+    """日付ごとのインデックスが壊れている場合は読み込み時に作り直す"""
+    with OddsCache(str(tmp_path)) as cache:
+        _save_races(cache)
+
+    index_path = tmp_path / DATE / "_index.json"
+    index_path.write_text("{broken", encoding='utf-8')
+
+    cache = OddsCache(str(tmp_path))
+    assert set(cache.load_race_infos(DATE)) == set(RACE_IDS)
+    assert set(json.loads(index_path.read_text(encoding='utf-8'))) == set(RACE_IDS)
+
+
+def test_corrupt_race_info_index_discarded_on_update(tmp_path):
+    """壊れたインデックスへの更新では破棄し、次回の読み込みで各ファイルから作り直す"""
+    with OddsCache(str(tmp_path)) as cache:
+        _save_races(cache, RACE_IDS[:2])
+
+    index_path = tmp_path / DATE / "_index.json"
+    index_path.write_text("{broken", encoding='utf-8')
+
+    with OddsCache(str(tmp_path)) as cache:
+        _save_races(cache, RACE_IDS[2:])
+    assert not index_path.exists()
+
+    race_infos = OddsCache(str(tmp_path)).load_race_infos(DATE)
+    assert set(race_infos) == set(RACE_IDS)
+
+
+def test_race_info_index_deleted_race(tmp_path):
+    """削除したレースは日付ごとのインデックスからも削除される"""
+    with OddsCache(str(tmp_path)) as cache:
+        _save_races(cache)
+        assert cache.delete_cache(RACE_IDS[1])
+        assert not cache.delete_cache(RACE_IDS[1])
+        assert RACE_IDS[1] not in cache.load_race_infos(DATE)
+
+    race_infos = json.loads((tmp_path / DATE / "_index.json").read_text(encoding='utf-8'))
+    assert set(race_infos) == {RACE_IDS[0], RACE_IDS[2]}
+
+
+def test_save_many_creates_date_dirs(tmp_path):
+    """save_manyは複数日付のディレクトリを作成してから並行して書き込む"""
+    race_ids = RACE_IDS + ["202501020501010" + str(i) for i in range(1, 3)]
+    cache = OddsCache(str(tmp_path))
+
+    saved = cache.save_many((race_id, [], {'race_name': race_id}) for race_id in race_ids)
+
+    assert saved == len(race_ids)
+    assert cache.get_cached_races("20250102") == race_ids[3:]
+    assert all(cache.has_cache(race_id) for race_id in race_ids)
+
+
+def test_save_time_series_creates_date_dir(tmp_path):
+    """時系列オッズの保存でも日付ディレクトリを作成する"""
+    with OddsCache(str(tmp_path)) as cache:
+        cache.save_time_series_odds(RACE_IDS[0], [{'odds_time': '093000'}])
+        assert cache.has_cache(RACE_IDS[0])
+        assert cache.index[RACE_IDS[0]]['timeline_count'] == 1
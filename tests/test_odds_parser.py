@@ -0,0 +1,166 @@
+"""
+オッズパーサーのテスト
+
+固定長のO1（単勝・複勝）、O2（枠連）、O6（三連複・三連単）レコードから
+期待どおりのオッズを切り出すか確認します。
+"""
+
+from src.odds_parser import OddsParser, parse_odds_record
+
+RACE_KEY = "2025010105010101"
+ODDS_TIME = "093015"
+PARSED_AT = "2025-01-01T09:30:15"
+
+
+def _header(record_id: str) -> str:
+    """レコード種別ID + データ区分 + レースキー + オッズ時刻（25バイト）"""
+    return f"{record_id}1{RACE_KEY}{ODDS_TIME}"
+
+
+def _o1_buffer() -> str:
+    """単勝3頭・複勝2頭分のO1レコード（空きエントリは空白）"""
+    tansho = (
+        "01" + "00035"      # 1番 3.5倍
+        + "02" + "     "    # 2番 オッズ空白（読み飛ばし）
+        + "03" + "00000"    # 3番 0.0倍
+        + "04" + "01234"    # 4番 123.4倍
+    ).ljust(18 * 7)
+    fukusho = (
+        "01" + "00012" + "00015" + "  "     # 1番 1.2-1.5倍
+        + "02" + "00020" + "     " + "  "  # 2番 最高オッズ空白（読み飛ばし）
+        + "04" + "00110" + "00250" + "  "  # 4番 11.0-25.0倍
+    ).ljust(18 * 14)
+    return _header("O1") + tansho + fukusho
+
+
+def test_parse_tansho_fukusho():
+    """O1レコードの単勝・複勝エントリ"""
+    result = OddsParser.parse_tansho_fukusho(_o1_buffer(), PARSED_AT)
+
+    assert result == {
+        'record_type': '単勝・複勝オッズ',
+        'record_id': 'O1',
+        'data_kbn': '1',
+        'race_key': RACE_KEY,
+        'odds_time': ODDS_TIME,
+        'odds_time_formatted': '09:30:15',
+        'tansho': [
+            {'umaban': 1, 'odds': 3.5},
+            {'umaban': 3, 'odds': 0.0},
+            {'umaban': 4, 'odds': 123.4},
+        ],
+        'fukusho': [
+            {'umaban': 1, 'odds_min': 1.2, 'odds_max': 1.5},
+            {'umaban': 4, 'odds_min': 11.0, 'odds_max': 25.0},
+        ],
+        'parsed_at': PARSED_AT,
+    }
+
+
+def test_parse_tansho_fukusho_truncated():
+    """途中で切れたO1レコードは完全なエントリだけを返す"""
+    # 単勝2件目の途中で切れている（複勝部分なし）
+    buff = _header("O1") + "01" + "00035" + "02" + "001"
+
+    result = OddsParser.parse_tansho_fukusho(buff, PARSED_AT)
+
+    assert result['tansho'] == [{'umaban': 1, 'odds': 3.5}]
+    assert result['fukusho'] == []
+
+
+def test_parse_tansho_fukusho_invalid_entry():
+    """数値でないエントリは読み飛ばす"""
+    buff = _header("O1") + "0x" + "00035" + "02" + "00041"
+
+    result = OddsParser.parse_tansho_fukusho(buff, PARSED_AT)
+
+    assert result['tansho'] == [{'umaban': 2, 'odds': 4.1}]
+
+
+def test_parse_wakuren():
+    """O2レコードの枠連エントリ"""
+    entries = (
+        "12" + "00056" + "  "    # 1-2枠 5.6倍
+        + "13" + "     " + "  "  # 1-3枠 オッズ空白（読み飛ばし）
+        + "88" + "00000" + "  "  # 8-8枠 0.0倍
+    )
+    buff = _header("O2") + entries.ljust(36 * 9)
+
+    result = OddsParser.parse_wakuren(buff, PARSED_AT)
+
+    assert result == {
+        'record_type': '枠連オッズ',
+        'record_id': 'O2',
+        'data_kbn': '1',
+        'race_key': RACE_KEY,
+        'odds_time': ODDS_TIME,
+        'odds_time_formatted': '09:30:15',
+        'combinations': [
+            {'waku1': 1, 'waku2': 2, 'odds': 5.6},
+            {'waku1': 8, 'waku2': 8, 'odds': 0.0},
+        ],
+        'parsed_at': PARSED_AT,
+    }
+
+
+def test_parse_wakuren_truncated():
+    """途中で切れたO2レコードは完全なエントリだけを返す"""
+    buff = _header("O2") + "12" + "00056" + "  " + "34" + "0012"
+
+    result = OddsParser.parse_wakuren(buff, PARSED_AT)
+
+    assert result['combinations'] == [{'waku1': 1, 'waku2': 2, 'odds': 5.6}]
+
+
+def _o6_buffer(entries: str) -> str:
+    """ヘッダー40バイト + 17バイトごとのエントリのO6レコード"""
+    return _header("O6").ljust(40) + entries
+
+
+def test_parse_sanrenpuku_sanrentan():
+    """O6レコードの三連複・三連単エントリ"""
+    entries = (
+        "01" + "02" + "03" + "0001234" + "0001"    # 1-2-3 123.4倍
+        + "01" + "02" + "04" + "0000000" + "0002"  # 1-2-4 0.0倍（発売なし、除外）
+        + "01" + "02" + "05" + "       " + "0003"  # 1-2-5 オッズ空白（読み飛ばし）
+        + "03" + "02" + "01" + "0056789" + "0004"  # 3-2-1 5678.9倍
+    )
+
+    result = OddsParser.parse_sanrenpuku_sanrentan(_o6_buffer(entries), PARSED_AT)
+
+    assert result == {
+        'record_type': '三連複・三連単オッズ',
+        'record_id': 'O6',
+        'data_kbn': '1',
+        'race_key': RACE_KEY,
+        'odds_time': ODDS_TIME,
+        'odds_data': {
+            '01-02-03': 123.4,
+            '03-02-01': 5678.9,
+        },
+        'parsed_at': PARSED_AT,
+    }
+
+
+def test_parse_sanrenpuku_sanrentan_truncated():
+    """途中で切れたO6レコードは末尾の半端なエントリを無視する"""
+    entries = "01" + "02" + "03" + "0001234" + "0001" + "04" + "05" + "06" + "00099"
+
+    result = OddsParser.parse_sanrenpuku_sanrentan(_o6_buffer(entries), PARSED_AT)
+
+    assert result['odds_data'] == {'01-02-03': 123.4}
+
+
+def test_parse_sanrenpuku_sanrentan_header_only():
+    """ヘッダーだけのO6レコードはオッズなし"""
+    result = OddsParser.parse_sanrenpuku_sanrentan(_o6_buffer(""), PARSED_AT)
+
+    assert result['odds_data'] == {}
+    assert result['odds_time'] == ODDS_TIME
+
+
+def test_parse_odds_record_dispatch():
+    """parse_odds_recordはレコードIDごとのパーサーに振り分ける"""
+    assert parse_odds_record('O1', _o1_buffer(), PARSED_AT) == \
+        OddsParser.parse_tansho_fukusho(_o1_buffer(), PARSED_AT)
+    assert 'error' in parse_odds_record('O9', _o1_buffer(), PARSED_AT)
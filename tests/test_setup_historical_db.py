@@ -0,0 +1,73 @@
+"""
+蓄積系データベースセットアップツールのテスト
+
+コマンドライン引数の日付検証と、日付範囲の生成を確認します。
+"""
+
+import pytest
+
+# セットアップツールはJV-Link（pywin32）を使用するフェッチャーをインポートする
+pytest.importorskip("win32com.client")
+
+from scripts.setup_historical_db import _is_valid_date, generate_date_range
+
+
+@pytest.mark.parametrize("value", [
+    "20240229",  # うるう年
+    "20000229",  # 400で割り切れる年はうるう年
+    "20250101",
+    "20251231",
+])
+def test_valid_date(value):
+    """実在する日付は有効"""
+    assert _is_valid_date(value)
+
+
+@pytest.mark.parametrize("value", [
+    "20230229",  # うるう年ではない
+    "19000229",  # 100で割り切れる年はうるう年ではない
+    "20250431",  # 30日までの月
+    "20250001",  # 月が00
+    "20251301",  # 月が13
+    "20250100",  # 日が00
+    "00000101",  # 年が0
+    "2025010",   # 7桁
+    "202501011",  # 9桁
+    "2025-01-01",
+    "2025O101",  # 数字以外
+    "２０２５０１０１",  # 全角数字
+    "",
+])
+def test_invalid_date(value):
+    """実在しない日付・YYYYMMDD形式でない文字列は無効"""
+    assert not _is_valid_date(value)
+
+
+def test_date_range_single_day():
+    """終了日の指定がない場合は開始日のみ"""
+    assert generate_date_range("20250101") == ["20250101"]
+    assert generate_date_range("20250101", "20250101") == ["20250101"]
+
+
+def test_date_range_across_month():
+    """月をまたぐ範囲（うるう年の2月末を含む）"""
+    assert generate_date_range("20240227", "20240302") == [
+        "20240227", "20240228", "20240229", "20240301", "20240302",
+    ]
+
+
+def test_date_range_across_year():
+    """年をまたぐ範囲"""
+    assert generate_date_range("20241230", "20250102") == [
+        "20241230", "20241231", "20250101", "20250102",
+    ]
+
+
+def test_date_range_reversed():
+    """終了日が開始日より前の場合は空"""
+    assert generate_date_range("20250102", "20250101") == []
+
+
+def test_date_range_invalid():
+    """解釈できない日付の場合は開始日のみ"""
+    assert generate_date_range("20250101", "20251301") == ["20250101"]